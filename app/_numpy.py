@@ -0,0 +1,29 @@
+# app/_numpy.py
+"""
+numpy, imported on first use. The summarizer and the scorer work without it
+(truncated summaries, per-item scoring), and startup does not pay for the import.
+"""
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_numpy = None
+_checked = False
+_warned = set()
+
+
+def load_numpy(fallback: Optional[str] = None):
+    """The numpy module, or None if it is not installed; then `fallback` is logged (once per message)."""
+    global _numpy, _checked
+    if not _checked:
+        _checked = True
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            pass
+    if _numpy is None and fallback and fallback not in _warned:
+        _warned.add(fallback)
+        logger.warning(fallback)
+    return _numpy
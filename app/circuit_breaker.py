@@ -67,3 +67,20 @@ class CircuitBreaker:
         elif self.state == CircuitState.HALF_OPEN:
             self.state = CircuitState.OPEN
             logger.warning("CircuitBreaker: Probe failed. State changed back to OPEN.")
+
+    def to_dict(self) -> dict:
+        """Serializable state, for warm restarts."""
+        return {
+            "state": self.state.value,
+            "failures": self.failures,
+            "last_failure_time": self.last_failure_time
+        }
+
+    def restore(self, data: dict):
+        """Load state saved by to_dict()."""
+        try:
+            self.state = CircuitState(data.get("state", CircuitState.CLOSED.value))
+        except ValueError:
+            self.state = CircuitState.CLOSED
+        self.failures = data.get("failures", 0)
+        self.last_failure_time = data.get("last_failure_time", 0)
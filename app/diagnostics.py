@@ -0,0 +1,224 @@
+# app/diagnostics.py
+import concurrent.futures
+import http.client
+import logging
+import os
+import socket
+import ssl
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urljoin, urlsplit
+
+import certifi
+
+from app import source_parsers
+from app.host_limiter import HOST_MAX_CONCURRENCY, HostLimiter, RateLimited, host_of
+from app.source_parsers import MAX_SOURCE_BYTES
+
+logger = logging.getLogger(__name__)
+
+# One probe run (all sources) is cut off after this; unfinished probes are reported as such
+DIAG_DEADLINE_SEC = float(os.getenv("DIAG_DEADLINE_SEC", "8"))
+# Socket timeout of each phase of one probe
+DIAG_PROBE_TIMEOUT_SEC = float(os.getenv("DIAG_PROBE_TIMEOUT_SEC", "5"))
+# Results are reused for this long, so repeated calls don't hit upstream again
+DIAG_CACHE_TTL_SEC = float(os.getenv("DIAG_CACHE_TTL_SEC", "60"))
+DIAG_WORKERS = int(os.getenv("DIAG_WORKERS", "16"))
+MAX_REDIRECTS = 3
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+def _ms(seconds: float) -> int:
+    return int(seconds * 1000)
+
+
+def probe_source(source: Dict, timeout: float = DIAG_PROBE_TIMEOUT_SEC, max_bytes: int = MAX_SOURCE_BYTES) -> Dict:
+    """
+    Fetch and parse one source outside the fetch pipeline (no breakers, validators or
+    cached entries), timing each phase in ms: DNS, TCP connect, TLS handshake, time to
+    the response headers, body download and parse. Redirects add up across hops.
+    On failure, `failed_phase` names the phase that raised.
+    """
+    result = {
+        "name": source.get("name", "Unknown"),
+        "url": source.get("url"),
+        "type": source.get("type", "rss"),
+        "ok": False,
+        "status": None,
+        "dns_ms": 0, "connect_ms": 0, "tls_ms": 0, "ttfb_ms": 0, "download_ms": 0, "parse_ms": 0, "total_ms": 0,
+        "bytes": 0,
+        "entries": 0,
+        "redirects": 0,
+        "error": None,
+        "failed_phase": None
+    }
+    started = time.perf_counter()
+    url = source.get("url")
+    try:
+        for _ in range(MAX_REDIRECTS + 1):
+            status, location, body = _probe_url(url, timeout, max_bytes, result)
+            if status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                result["redirects"] += 1
+                continue
+            break
+        result["status"] = status
+        result["failed_phase"] = "status"
+        if status != 200:
+            raise ValueError(f"HTTP {status}")
+        result["bytes"] = len(body)
+
+        result["failed_phase"] = "parse"
+        t = time.perf_counter()
+        result["entries"] = len(source_parsers.parse_payload(source, body))
+        result["parse_ms"] = _ms(time.perf_counter() - t)
+        result["ok"] = True
+        result["failed_phase"] = None
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["total_ms"] = _ms(time.perf_counter() - started)
+    if result["redirects"]:
+        result["final_url"] = url
+    return result
+
+
+def _probe_url(url: str, timeout: float, max_bytes: int, result: Dict):
+    """One request, phase by phase. Returns (status, Location header, body)."""
+    parts = urlsplit(url)
+    https = parts.scheme == "https"
+    host = parts.hostname
+    port = parts.port or (443 if https else 80)
+
+    result["failed_phase"] = "dns"
+    t = time.perf_counter()
+    addresses = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    result["dns_ms"] += _ms(time.perf_counter() - t)
+
+    result["failed_phase"] = "connect"
+    t = time.perf_counter()
+    sock = None
+    error = None
+    for family, sock_type, proto, _, address in addresses:
+        sock = socket.socket(family, sock_type, proto)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(address)
+            break
+        except OSError as e:
+            sock.close()
+            sock, error = None, e
+    if sock is None:
+        raise error or OSError(f"No address for {host}")
+    result["connect_ms"] += _ms(time.perf_counter() - t)
+
+    conn = None
+    try:
+        if https:
+            result["failed_phase"] = "tls"
+            t = time.perf_counter()
+            context = ssl.create_default_context(cafile=certifi.where())
+            sock = context.wrap_socket(sock, server_hostname=host)
+            result["tls_ms"] += _ms(time.perf_counter() - t)
+
+        # The connection reuses the socket opened above instead of connecting itself
+        conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        conn.sock = sock
+        path = parts.path or "/"
+        if parts.query:
+            path += f"?{parts.query}"
+        result["failed_phase"] = "ttfb"
+        t = time.perf_counter()
+        headers = {"Host": parts.netloc, "User-Agent": USER_AGENT, "Accept-Encoding": "identity", "Connection": "close"}
+        conn.request("GET", path, headers=headers)
+        response = conn.getresponse()
+        result["ttfb_ms"] += _ms(time.perf_counter() - t)
+
+        result["failed_phase"] = "download"
+        t = time.perf_counter()
+        body = response.read(max_bytes)
+        result["download_ms"] += _ms(time.perf_counter() - t)
+        return response.status, response.getheader("Location"), body
+    finally:
+        if conn is not None:
+            conn.close()
+        else:
+            sock.close()
+
+
+class FeedDiagnostics:
+    """
+    Parallel probe of every source behind /debug/feeds, with its own deadline and
+    a per-host concurrency cap. Results are cached for `ttl` seconds; callers
+    arriving while a run is in progress wait for it instead of starting another.
+    Hosts under a production Retry-After deferral (`blocked_for`) are not probed.
+    """
+
+    def __init__(self, ttl: float = DIAG_CACHE_TTL_SEC, deadline: float = DIAG_DEADLINE_SEC,
+                 host_max_concurrency: int = HOST_MAX_CONCURRENCY):
+        self.ttl = ttl
+        self.deadline = deadline
+        self.host_max_concurrency = host_max_concurrency
+        self._lock = threading.Lock()
+        self._cached: Optional[Dict] = None
+        self._cached_at = 0.0
+
+    def report(self, sources: List[Dict], blocked_for: Optional[Callable[[str], float]] = None,
+               force: bool = False) -> Dict:
+        with self._lock:
+            now = time.time()
+            if self._cached is not None and not force and now - self._cached_at < self.ttl:
+                return dict(self._cached, cached=True, age_sec=round(now - self._cached_at, 1))
+            self._cached = self._run(sources, blocked_for)
+            self._cached_at = time.time()
+            return dict(self._cached, cached=False, age_sec=0.0)
+
+    def _run(self, sources: List[Dict], blocked_for: Optional[Callable[[str], float]]) -> Dict:
+        started = time.time()
+        end = started + self.deadline
+        # Own limiter: probes don't take production slots, but stay polite per host
+        limiter = HostLimiter(self.host_max_concurrency, 0)
+
+        def probe(source: Dict) -> Dict:
+            with limiter.slot(host_of(source["url"]), max(0.0, end - time.time())):
+                return probe_source(source, timeout=max(0.5, min(DIAG_PROBE_TIMEOUT_SEC, end - time.time())))
+
+        results: Dict[str, Dict] = {}
+        futures = {}
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=DIAG_WORKERS, thread_name_prefix="diag")
+        try:
+            for source in sources:
+                deferred = blocked_for(host_of(source["url"])) if blocked_for else 0
+                if deferred:
+                    results[source["url"]] = self._unprobed(source, f"Host deferred by Retry-After ({int(deferred)}s left)")
+                    continue
+                futures[pool.submit(probe, source)] = source
+            done, _ = concurrent.futures.wait(futures, timeout=max(0.0, end - time.time()))
+            for future, source in futures.items():
+                if future not in done:
+                    results[source["url"]] = self._unprobed(source, f"No answer within the {self.deadline:.0f}s deadline")
+                    continue
+                try:
+                    results[source["url"]] = future.result()
+                except RateLimited:
+                    results[source["url"]] = self._unprobed(source, "No host slot before the deadline")
+        finally:
+            # Stragglers finish on their socket timeouts; nobody waits for them
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        probes = [results[src["url"]] for src in sources]
+        elapsed = time.time() - started
+        logger.info(f"Diagnostics: {sum(1 for p in probes if p['ok'])}/{len(probes)} sources OK in {elapsed:.1f}s")
+        return {
+            "checked_at": datetime.fromtimestamp(started, timezone.utc).isoformat(),
+            "elapsed_ms": _ms(elapsed),
+            "ok": sum(1 for p in probes if p["ok"]),
+            "total": len(probes),
+            "sources": probes
+        }
+
+    @staticmethod
+    def _unprobed(source: Dict, error: str) -> Dict:
+        return {"name": source.get("name", "Unknown"), "url": source.get("url"), "type": source.get("type", "rss"),
+                "ok": False, "error": error}
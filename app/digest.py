@@ -0,0 +1,79 @@
+# app/digest.py
+import heapq
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from app.news_item import NewsItem, to_dicts
+
+logger = logging.getLogger(__name__)
+
+DIGEST_WINDOW_DAYS = 7
+TOP_EVENTS = 5
+MAX_LAWS = 5
+# Regular news needs at least this score to count as a top event
+TOP_EVENT_MIN_SCORE = 4
+# Shown when the week has neither top events nor laws
+FALLBACK_EVENTS = 3
+LAW_TYPES = ("law", "constitution")
+
+
+def _rank(item: NewsItem):
+    return (item.score, item.published)
+
+
+class WeeklyDigest:
+    """
+    Rolling 7-day digest, maintained as items are ingested.
+
+    Every accepted item is kept (by link) until its publication date leaves the
+    window, so articles that have dropped out of their source feeds still count.
+    `build()` selects the top events and laws from that small set.
+    """
+
+    def __init__(self, window_days: int = DIGEST_WINDOW_DAYS):
+        self.window = timedelta(days=window_days)
+        self.items: Dict[str, NewsItem] = {}
+
+    def add(self, items: List[NewsItem], now: Optional[datetime] = None):
+        """Merge one poll's accepted items (newer score/summary wins) and drop expired ones."""
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - self.window
+        for item in items:
+            if item.link and item.published >= cutoff:
+                self.items[item.link] = item
+        self._expire(cutoff)
+
+    def _expire(self, cutoff: datetime):
+        expired = [link for link, item in self.items.items() if item.published < cutoff]
+        for link in expired:
+            del self.items[link]
+
+    def build(self, now: Optional[datetime] = None) -> Dict:
+        now = now or datetime.now(timezone.utc)
+        start = now - self.window
+        self._expire(start)
+
+        laws = heapq.nlargest(MAX_LAWS, (i for i in self.items.values() if i.type in LAW_TYPES), key=_rank)
+        regular = [i for i in self.items.values() if i.type not in LAW_TYPES]
+        top_events = heapq.nlargest(TOP_EVENTS, (i for i in regular if i.score >= TOP_EVENT_MIN_SCORE), key=_rank)
+        if not top_events and not laws:
+            top_events = heapq.nlargest(FALLBACK_EVENTS, regular, key=_rank)
+
+        return {
+            "window_start": start.isoformat(),
+            "window_end": now.isoformat(),
+            "total": len(self.items),
+            "top_events": to_dicts(top_events),
+            "laws": to_dicts(laws)
+        }
+
+    # --- Warm start ---
+
+    def export_state(self) -> Dict:
+        return {"items": to_dicts(self.items.values())}
+
+    def load_state(self, state: Dict):
+        items = (NewsItem.from_dict(data) for data in state.get("items", []))
+        self.add([item for item in items if item is not None])
+        logger.info(f"Digest: Restored {len(self.items)} items in the weekly window")
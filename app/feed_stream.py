@@ -0,0 +1,211 @@
+# app/feed_stream.py
+import logging
+import re
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from xml.etree.ElementTree import XMLPullParser, ParseError
+
+logger = logging.getLogger(__name__)
+
+# Element names (namespace stripped) we care about
+ITEM_TAGS = {"item", "entry"}
+SUMMARY_TAGS = ("description", "summary", "encoded", "content")
+DATE_TAGS = ("pubDate", "published", "updated", "date")
+
+# Raw-byte scan used by read_feed_stream (no XML parsing)
+ITEM_START_RE = re.compile(rb"<(?:[\w.-]+:)?(?:item|entry)[\s>/]")
+ITEM_END_RE = re.compile(rb"</(?:[\w.-]+:)?(?:item|entry)\s*>")
+DATE_RE = re.compile(rb"<(?:[\w.-]+:)?(pubDate|published|updated|date)(?:\s[^>]*)?>([^<]*)<")
+
+
+def _local(tag: str) -> str:
+    """Strip '{namespace}' prefix from an ElementTree tag."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _parse_date(value: str) -> Optional[datetime]:
+    """Parse RFC 822 (RSS) or ISO 8601 (Atom) dates. Returns None if unknown."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def _scan_date(item: bytes) -> Optional[datetime]:
+    """Publication date of one raw <item>/<entry>, picked like _item_to_entry does."""
+    found = {}
+    for match in DATE_RE.finditer(item):
+        value = match.group(2).strip()
+        if value:
+            found.setdefault(match.group(1).decode("ascii"), value)
+    published = next((found[t] for t in DATE_TAGS if t in found), b"")
+    return _parse_date(published.decode("utf-8", "replace"))
+
+
+def _item_to_entry(elem) -> Dict:
+    fields = {}
+    link = ""
+    for child in elem:
+        name = _local(child.tag)
+        if name == "link":
+            # Atom: <link rel="alternate" href="..."/>, RSS: <link>...</link>
+            href = child.get("href")
+            if href and child.get("rel", "alternate") == "alternate":
+                link = link or href
+            elif child.text:
+                link = link or child.text.strip()
+        elif name not in fields:
+            fields[name] = (child.text or "").strip()
+
+    summary = next((fields[t] for t in SUMMARY_TAGS if fields.get(t)), "")
+    published = next((fields[t] for t in DATE_TAGS if fields.get(t)), "")
+    return {
+        "title": fields.get("title", ""),
+        "link": link,
+        "summary": summary,
+        "published": published,
+    }
+
+
+def parse_feed_stream(
+    chunks: Iterable[bytes],
+    horizon: Optional[datetime] = None,
+    max_bytes: Optional[int] = None,
+    stale_streak: Optional[int] = None,
+) -> Tuple[List[Dict], Dict]:
+    """
+    Incrementally parse an RSS/Atom document from byte chunks.
+
+    - Entries older than `horizon` are skipped.
+    - After `stale_streak` consecutive stale entries parsing stops (feeds sorted newest first).
+    - Reading stops once `max_bytes` have been consumed.
+    Malformed XML falls back to feedparser over the whole document: the rest of the
+    stream (up to `max_bytes`) is read first.
+
+    Returns (entries, stats).
+    """
+    parser = XMLPullParser(events=("end",))
+    consumed = []  # Chunk references for the fallback, joined only if it is needed
+    entries = []
+    stats = {"bytes": 0, "truncated": False, "stopped_early": False, "fallback": False}
+    streak = 0
+    chunks = iter(chunks)
+
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            if max_bytes is not None and stats["bytes"] + len(chunk) > max_bytes:
+                chunk = chunk[:max_bytes - stats["bytes"]]
+                stats["truncated"] = True
+            stats["bytes"] += len(chunk)
+            consumed.append(chunk)
+            parser.feed(chunk)
+
+            for _, elem in parser.read_events():
+                if _local(elem.tag) not in ITEM_TAGS:
+                    continue
+                entry = _item_to_entry(elem)
+                elem.clear()  # Release the subtree, we only keep the extracted dict
+
+                pub_dt = _parse_date(entry["published"])
+                if horizon is not None and pub_dt is not None and pub_dt < horizon:
+                    streak += 1
+                    if stale_streak is not None and streak >= stale_streak:
+                        stats["stopped_early"] = True
+                        break
+                    continue
+                streak = 0
+                entries.append(entry)
+
+            if stats["stopped_early"] or stats["truncated"]:
+                break
+    except ParseError as e:
+        logger.debug(f"Streaming parse failed ({e}), falling back to feedparser")
+        stats["fallback"] = True
+        entries = []
+        # The error can come early (e.g. an undefined entity): feedparser needs the rest too
+        for chunk in chunks:
+            if max_bytes is not None and stats["bytes"] + len(chunk) > max_bytes:
+                chunk = chunk[:max_bytes - stats["bytes"]]
+                stats["truncated"] = True
+            stats["bytes"] += len(chunk)
+            consumed.append(chunk)
+            if stats["truncated"]:
+                break
+        import feedparser  # Only needed for malformed feeds
+        feed = feedparser.parse(b"".join(consumed))
+        for entry in feed.entries:
+            published = entry.get("published", entry.get("updated", ""))
+            pub_dt = _parse_date(published)
+            if horizon is not None and pub_dt is not None and pub_dt < horizon:
+                continue
+            entries.append({
+                "title": entry.get("title", ""),
+                "link": entry.get("link", ""),
+                "summary": entry.get("summary", entry.get("description", "")),
+                "published": published,
+            })
+
+    return entries, stats
+
+
+def read_feed_stream(
+    chunks: Iterable[bytes],
+    horizon: Optional[datetime] = None,
+    max_bytes: Optional[int] = None,
+    stale_streak: Optional[int] = None,
+) -> Tuple[bytes, Dict]:
+    """
+    Read an RSS/Atom document from byte chunks for parsing elsewhere (the parse pool),
+    stopping where parse_feed_stream would: after `stale_streak` consecutive entries
+    older than `horizon`, or once `max_bytes` have been read. Entries are only scanned
+    for their date, not parsed.
+
+    Returns (body, stats).
+    """
+    buffer = bytearray()
+    stats = {"bytes": 0, "truncated": False, "stopped_early": False}
+    scanned = 0  # Buffer offset after the last complete entry
+    streak = 0
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if max_bytes is not None and len(buffer) + len(chunk) > max_bytes:
+            chunk = chunk[:max_bytes - len(buffer)]
+            stats["truncated"] = True
+        buffer.extend(chunk)
+
+        if horizon is not None and stale_streak is not None:
+            for end in ITEM_END_RE.finditer(buffer, scanned):
+                item = bytes(buffer[scanned:end.start()])
+                scanned = end.end()
+                # The segment also holds whatever came before the entry (e.g. the channel header)
+                start = None
+                for start in ITEM_START_RE.finditer(item):
+                    pass
+                pub_dt = _scan_date(item[start.start():]) if start is not None else None
+                if pub_dt is not None and pub_dt < horizon:
+                    streak += 1
+                    if streak >= stale_streak:
+                        stats["stopped_early"] = True
+                        break
+                else:
+                    streak = 0
+
+        if stats["stopped_early"] or stats["truncated"]:
+            break
+
+    stats["bytes"] = len(buffer)
+    return bytes(buffer), stats
@@ -0,0 +1,104 @@
+# app/host_limiter.py
+import os
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+# Per-host politeness: requests in flight, spacing between request starts, and how long
+# a fetch thread may wait for its host before the source is skipped for this poll
+HOST_MAX_CONCURRENCY = int(os.getenv("HOST_MAX_CONCURRENCY", "2"))
+HOST_MIN_INTERVAL_SEC = float(os.getenv("HOST_MIN_INTERVAL_SEC", "0.5"))
+HOST_MAX_WAIT_SEC = float(os.getenv("HOST_MAX_WAIT_SEC", "6"))
+
+class RateLimited(Exception):
+    """The host asked us to back off (429/503 + Retry-After), or its slot could not be had in time."""
+
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f"Rate limited by {host} (retry in {int(retry_after)}s)")
+        self.host = host
+        self.retry_after = retry_after
+
+
+def host_of(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - (now or time.time()))
+    except (TypeError, ValueError):
+        return None
+
+
+class HostLimiter:
+    """
+    Politeness limits shared by all fetch threads, per upstream host:
+    at most `max_concurrency` requests in flight, request starts at least
+    `min_interval` seconds apart, and nothing before a Retry-After deadline.
+    """
+
+    def __init__(self, max_concurrency: int = 2, min_interval: float = 0.5, max_retry_after: float = 900):
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_interval = min_interval
+        self.max_retry_after = max_retry_after
+        self._cond = threading.Condition()
+        self._active: Dict[str, int] = {}
+        self._next_start: Dict[str, float] = {}
+        self.blocked_until: Dict[str, float] = {}
+
+    def blocked_for(self, host: str, now: Optional[float] = None) -> float:
+        """Seconds left on a Retry-After deferral (0 if none)."""
+        return max(0.0, self.blocked_until.get(host, 0) - (now or time.time()))
+
+    def defer(self, host: str, seconds: float):
+        """Honour a Retry-After: no requests to `host` for `seconds` (capped)."""
+        with self._cond:
+            until = time.time() + min(max(seconds, 0), self.max_retry_after)
+            self.blocked_until[host] = max(self.blocked_until.get(host, 0), until)
+
+    @contextmanager
+    def slot(self, host: str, max_wait: float):
+        """
+        Hold one of the host's request slots. Waits up to `max_wait` seconds for a
+        free slot and for the spacing / Retry-After deadline, else raises RateLimited.
+        """
+        deadline = time.time() + max_wait
+        with self._cond:
+            while True:
+                now = time.time()
+                start_at = max(self._next_start.get(host, 0), self.blocked_until.get(host, 0))
+                if self._active.get(host, 0) < self.max_concurrency and start_at <= now:
+                    break
+                if start_at > deadline:
+                    raise RateLimited(host, start_at - now)
+                if now >= deadline:
+                    raise RateLimited(host, 0)
+                self._cond.wait(min(deadline, max(start_at, now + 0.01)) - now)
+            self._active[host] = self._active.get(host, 0) + 1
+            self._next_start[host] = now + self.min_interval
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active[host] -= 1
+                self._cond.notify_all()
+
+    # --- Warm start ---
+
+    def export_state(self) -> Dict:
+        now = time.time()
+        return {host: until for host, until in self.blocked_until.items() if until > now}
+
+    def load_state(self, state: Dict):
+        with self._cond:
+            for host, until in state.items():
+                self.blocked_until[host] = max(self.blocked_until.get(host, 0), until)
@@ -1,6 +1,15 @@
-from fastapi import FastAPI
-from app.rss_parser import RSSParser
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from contextlib import asynccontextmanager
+from app.snapshot_store import SnapshotStore, SnapshotRefresher
+from app.search_index import SearchIndex
+from app.digest import WeeklyDigest
+from app.news_item import to_dicts
+import json
 import logging
+import os
+import threading
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -10,40 +19,289 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Shared snapshot: one worker scrapes, every uvicorn worker serves the same file
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "news_snapshot.bin")
+REFRESH_INTERVAL_SEC = int(os.getenv("REFRESH_INTERVAL_SEC", "300"))
+FIRST_SNAPSHOT_WAIT_SEC = 30
+# Live /news/stream passes allowed at once per worker (each one polls every source)
+STREAM_MAX_CONCURRENT = int(os.getenv("STREAM_MAX_CONCURRENT", "2"))
+# Append-only log of every accepted article, tailed by each worker's search index
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", "search_index.jsonl")
+
+# The scraping pipeline (requests, bs4, numpy...) is imported and built on first use,
+# in the refresher thread, so workers answer /health before it is loaded.
+_rss_parser = None
+_rss_parser_lock = threading.RLock()
+_feed_diagnostics = None
+_feed_sources = None
+
+def get_rss_parser():
+    global _rss_parser
+    with _rss_parser_lock:
+        if _rss_parser is None:
+            from app.rss_parser import RSSParser
+            _rss_parser = RSSParser()
+    return _rss_parser
+
+def get_feed_diagnostics():
+    """The /debug/feeds prober and the sources it probes (every region's, as polled), without building an RSSParser."""
+    global _feed_diagnostics, _feed_sources
+    with _rss_parser_lock:
+        if _feed_diagnostics is None:
+            from app.diagnostics import FeedDiagnostics
+            from app.regions import load_profiles, shared_sources
+            _feed_diagnostics = FeedDiagnostics()
+            _feed_sources = shared_sources(load_profiles())
+    return _feed_diagnostics, _feed_sources
+
+def host_backoff_blocked_for():
+    """
+    blocked_for(host) over the Retry-After deferrals the refresher last published
+    (snapshot _fetch_state), plus this worker's own if it has polled itself.
+    """
+    backoff = {}
+    snapshot = snapshot_store.read()
+    if snapshot is not None and snapshot.has_section("_fetch_state"):
+        backoff = snapshot.json("_fetch_state").get("host_backoff", {})
+    local = _rss_parser.host_limiter if _rss_parser is not None else None
+
+    def blocked_for(host: str) -> float:
+        remaining = max(0.0, backoff.get(host, 0) - time.time())
+        return max(remaining, local.blocked_for(host)) if local else remaining
+    return blocked_for
+
+_warm_started = False
+
+def warm_start():
+    """
+    Before this process's first scrape, restore breakers and conditional-GET validators
+    from the last snapshot, so sources answer 304 and dead sources stay skipped, plus
+    the weekly digest window. Also covers a worker taking over as refresher after the
+    previous one died.
+    """
+    global _warm_started
+    with _rss_parser_lock:
+        if _warm_started:
+            return
+        # Set once restored (or failed): callers that waited on the lock don't restore twice
+        snapshot = snapshot_store.read()
+        try:
+            if snapshot is not None and snapshot.has_section("_fetch_state"):
+                get_rss_parser().load_state(snapshot.json("_fetch_state"))
+            if snapshot is not None and snapshot.has_section("_digest"):
+                weekly_digest.load_state(snapshot.json("_digest"))
+        except Exception as e:
+            logger.error(f"Warm start: Could not restore state: {e}")
+        _warm_started = True
+
+def build_snapshot_sections():
+    """Run the pipeline once and serialize everything the read endpoints serve."""
+    rss_parser = get_rss_parser()
+    warm_start()
+    # One shared poll; every region gets its own filtered list. /news, the digest and
+    # search cover the default region.
+    news_by_region = rss_parser.fetch_regions()
+    news_items = news_by_region[rss_parser.profile.id]
+    weekly_digest.add(news_items)
+    try:
+        added = search_index.append(news_items)
+        if added:
+            logger.info(f"Search: Indexed {added} new articles")
+    except Exception as e:
+        logger.error(f"Search: Failed to index articles: {e}")
+    sections = {
+        "news": json.dumps({"count": len(news_items), "data": to_dicts(news_items)}, ensure_ascii=False).encode("utf-8"),
+        "sources": json.dumps({
+            "sources": rss_parser.get_sources_status(),
+            "summarizer": rss_parser.summarizer.status()
+        }, ensure_ascii=False).encode("utf-8"),
+        "digest_week": json.dumps(weekly_digest.build(), ensure_ascii=False).encode("utf-8"),
+        "_fetch_state": json.dumps(rss_parser.export_state(), ensure_ascii=False).encode("utf-8"),
+        "_digest": json.dumps(weekly_digest.export_state(), ensure_ascii=False).encode("utf-8"),
+        "regions": json.dumps({
+            "default": rss_parser.profile.id,
+            "regions": [profile.describe() for profile in rss_parser.regions.values()]
+        }, ensure_ascii=False).encode("utf-8")
+    }
+    for region_id, items in news_by_region.items():
+        if region_id != rss_parser.profile.id:
+            sections[f"news:{region_id}"] = json.dumps(
+                {"count": len(items), "data": to_dicts(items)}, ensure_ascii=False
+            ).encode("utf-8")
+    return sections
+
+_stream_slots = threading.BoundedSemaphore(STREAM_MAX_CONCURRENT)
+
+snapshot_store = SnapshotStore(SNAPSHOT_PATH)
+search_index = SearchIndex(SEARCH_INDEX_PATH)
+weekly_digest = WeeklyDigest()
+refresher = SnapshotRefresher(snapshot_store, build_snapshot_sections, REFRESH_INTERVAL_SEC)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # A snapshot left by the previous run is served immediately (even if stale);
+    # the refresher replaces it in the background once it is due.
+    snapshot = snapshot_store.read()
+    if snapshot is not None:
+        logger.info(f"Warm start: Serving snapshot v{snapshot.version} ({snapshot.age():.0f}s old)")
+    refresher.start()
+    yield
+    refresher.stop()
+
 app = FastAPI(
     title="Ulytau Inside AI Agent",
     description="AI-powered news monitoring agent for Ulytau region",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-# Initialize Parser
-rss_parser = RSSParser()
+def current_snapshot():
+    snapshot = refresher.wait_for_snapshot(FIRST_SNAPSHOT_WAIT_SEC)
+    if snapshot is None:
+        raise HTTPException(status_code=503, detail="News snapshot is not ready yet")
+    return snapshot
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """RFC 7232 weak comparison against an If-None-Match header value."""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return any(c == etag or c == "W/" + etag for c in candidates)
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """RFC 7231 Accept-Encoding: gzip (or "*" when gzip is not listed) with a non-zero q-value."""
+    gzip_q = star_q = None
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding in ("gzip", "x-gzip"):
+            gzip_q = q
+        elif coding == "*":
+            star_q = q
+    if gzip_q is not None:
+        return gzip_q > 0
+    return bool(star_q)
+
+def snapshot_response(request: Request, name: str) -> Response:
+    """
+    Serve a pre-serialized snapshot section: 304 if the client already has it,
+    the stored gzip copy if the client accepts it, the plain bytes otherwise.
+    """
+    snapshot = current_snapshot()
+    if not snapshot.has_section(name):
+        # Snapshot written before this section existed; the next refresh adds it
+        raise HTTPException(status_code=503, detail=f"'{name}' is not in the current snapshot yet")
+    headers = {"Vary": "Accept-Encoding", "X-Snapshot-Version": str(snapshot.version)}
+    # The gzip copy has its own ETag, so caches never confuse the two representations
+    if accepts_gzip(request.headers.get("accept-encoding", "")) and snapshot.has_section(name + ".gz"):
+        name += ".gz"
+        headers["Content-Encoding"] = "gzip"
+    etag = snapshot.etag(name)
+    if etag:
+        headers["ETag"] = etag
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.section(name), media_type="application/json", headers=headers)
 
 @app.get("/")
 def read_root():
     return {"message": "Ulytau Inside AI Agent is running. Go to /news to see latest updates."}
 
 @app.get("/news")
-def get_news():
+def get_news(request: Request):
     """
     Get latest news. 
     Strict filtering is now Enforced by default in the parser.
     """
     # We remove query params logic to simplify: filtering is hardcoded in parser now.
-    news_items = rss_parser.fetch_news()
-    return {
-        "count": len(news_items),
-        "data": news_items
-    }
+    # Served from the shared snapshot (refreshed in the background), already serialized.
+    return snapshot_response(request, "news")
+
+@app.get("/regions")
+def list_regions(request: Request):
+    """
+    Configured region profiles. All regions share one fetch of the upstream sources.
+    """
+    return snapshot_response(request, "regions")
+
+@app.get("/regions/{region_id}/news")
+def region_news(region_id: str, request: Request):
+    """
+    Latest news of one region (same format as /news, which serves the default region).
+    """
+    snapshot = current_snapshot()
+    if not snapshot.has_section("regions"):
+        raise HTTPException(status_code=503, detail="'regions' is not in the current snapshot yet")
+    regions = snapshot.json("regions")
+    if region_id == regions["default"]:
+        return snapshot_response(request, "news")
+    if not any(region["id"] == region_id for region in regions["regions"]):
+        raise HTTPException(status_code=404, detail=f"Unknown region '{region_id}'")
+    return snapshot_response(request, f"news:{region_id}")
+
+@app.get("/news/stream")
+def news_stream():
+    """
+    Live poll streamed as NDJSON: one {"item": ...} line per accepted item, in the order
+    sources complete, then one {"summary": ...} line with per-source status.
+    """
+    if not _stream_slots.acquire(blocking=False):
+        raise HTTPException(status_code=429, detail="Too many live streams, use /news")
+
+    def generate():
+        try:
+            started = time.time()
+            rss_parser = get_rss_parser()
+            warm_start()
+            count = 0
+            sources = []
+            # Sources a running refresh is fetching are joined, not requested again (see iter_fetch)
+            for source, items in rss_parser.iter_news():
+                for item in items:
+                    yield json.dumps({"item": item.to_dict()}, ensure_ascii=False) + "\n"
+                count += len(items)
+                status = rss_parser.source_statuses.get(source["url"]) or {"name": source.get("name"), "url": source["url"]}
+                sources.append(dict(status, items=len(items)))
+            summary = {"count": count, "elapsed_ms": int((time.time() - started) * 1000), "sources": sources}
+            yield json.dumps({"summary": summary}, ensure_ascii=False) + "\n"
+        finally:
+            _stream_slots.release()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
 
 @app.get("/debug/sources")
-def debug_sources():
+def debug_sources(request: Request):
     """
-    Check status of all configured sources.
+    Check status of all configured sources (as of the last snapshot refresh).
     """
-    return {
-        "sources": rss_parser.get_sources_status()
-    }
+    return snapshot_response(request, "sources")
+
+@app.get("/digest/week")
+def digest_week(request: Request):
+    """
+    Top events and laws of the last 7 days (by publication date), maintained as items are ingested.
+    """
+    return snapshot_response(request, "digest_week")
+
+@app.get("/search")
+def search(q: str, page: int = 1, page_size: int = 10):
+    """
+    Full-text search over every article accepted in the last SEARCH_RETENTION_DAYS
+    (not just the current /news list), ranked by relevance.
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query must not be empty")
+    return search_index.search(q, page=page, page_size=page_size)
 
 @app.get("/health")
 def health_check():
@@ -59,27 +317,13 @@ def health_check():
 @app.get("/debug/feeds")
 def debug_feeds():
     """
-    Debug endpoint to check status of RSS feeds.
+    Probe every source now, in parallel and outside the fetch pipeline (breakers and
+    validators are not touched): DNS, connect, TLS, TTFB, download and parse timings
+    plus entry counts. Cached for DIAG_CACHE_TTL_SEC per worker. Hosts the refresher
+    is backing off from (Retry-After) are not probed, in any worker.
     """
-    results = []
-    for feed_url in rss_parser.feeds:
-        try:
-            feed_data, error = rss_parser.parse_feed(feed_url)
-            entry_count = len(feed_data.entries) if feed_data else 0
-            results.append({
-                "url": feed_url,
-                "entries": entry_count,
-                "ok": feed_data is not None,
-                "error": str(error) if error else None
-            })
-        except Exception as e:
-            results.append({
-                "url": feed_url,
-                "entries": 0,
-                "ok": False,
-                "error": str(e)
-            })
-    return results
+    diagnostics, sources = get_feed_diagnostics()
+    return diagnostics.report(sources, host_backoff_blocked_for())
 
 if __name__ == "__main__":
     import uvicorn
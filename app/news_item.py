@@ -0,0 +1,74 @@
+# app/news_item.py
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+
+
+class Entry:
+    """
+    A raw parsed entry, as cached per source between polls.
+    Source names are interned: every entry of a source shares one string.
+    """
+    __slots__ = ("title", "link", "summary", "published", "source")
+
+    def __init__(self, title: str, link: str, summary: str, published: str, source: str):
+        self.title = title
+        self.link = link
+        self.summary = summary
+        self.published = published  # As found in the payload (parsed in process_entries)
+        self.source = sys.intern(source)
+
+    def to_list(self) -> List[str]:
+        """Compact JSON form for the persisted fetch state."""
+        return [self.title, self.link, self.summary, self.published, self.source]
+
+    @classmethod
+    def from_json(cls, data: Union[List, Dict]) -> "Entry":
+        if isinstance(data, dict):  # Fetch state written before entries were lists
+            return cls(data.get("title", ""), data.get("link", ""), data.get("summary", ""),
+                       data.get("published", ""), data.get("source_name") or "Unknown")
+        return cls(*data)
+
+
+class NewsItem:
+    """An accepted, scored news item. Converted to a dict only when serialized."""
+    __slots__ = ("title", "summary", "type", "source", "link", "score", "localities", "published")
+
+    def __init__(self, title: str, summary: str, type: str, source: Optional[str], link: str,
+                 score: int, localities: List[str], published: datetime):
+        self.title = title
+        self.summary = summary
+        self.type = type
+        self.source = source
+        self.link = link
+        self.score = score
+        self.localities = localities
+        self.published = published
+
+    def to_dict(self) -> Dict:
+        return {
+            "title": self.title,
+            "summary": self.summary,
+            "type": self.type,
+            "source": self.source,
+            "link": self.link,
+            "score": self.score,
+            "localities": self.localities,
+            "published": self.published.isoformat()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> Optional["NewsItem"]:
+        """Item from its JSON form; None if it has no valid publication date."""
+        try:
+            published = datetime.fromisoformat(data["published"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        source = data.get("source")
+        return cls(data.get("title", ""), data.get("summary", ""), data.get("type", "news"),
+                   sys.intern(source) if source else source, data.get("link", ""),
+                   data.get("score", 0), data.get("localities") or [], published)
+
+
+def to_dicts(items: List[NewsItem]) -> List[Dict]:
+    return [item.to_dict() for item in items]
@@ -0,0 +1,300 @@
+# app/payload_archive.py
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: single writer assumed
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Directory of the raw payload archive; unset disables archiving (replay with replay_archive.py)
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR")
+ARCHIVE_MAX_AGE_DAYS = float(os.getenv("ARCHIVE_MAX_AGE_DAYS", "14"))
+ARCHIVE_MAX_BYTES = int(os.getenv("ARCHIVE_MAX_BYTES", str(512 * 1024 * 1024)))
+# The age limit is applied this often; the size limit as soon as this process sees it exceeded
+ARCHIVE_PRUNE_INTERVAL_SEC = float(os.getenv("ARCHIVE_PRUNE_INTERVAL_SEC", "3600"))
+# A size prune goes down to this fraction of the limit, so the next poll does not prune again
+PRUNE_LOW_WATER = 0.9
+INDEX_FILE = "index.jsonl"
+LOCK_FILE = "index.lock"
+
+
+def tee_chunks(chunks: Iterable[bytes], sink: bytearray) -> Iterator[bytes]:
+    """Pass a streamed body through while keeping a copy of what was consumed."""
+    for chunk in chunks:
+        sink.extend(chunk)
+        yield chunk
+
+
+class PayloadArchive:
+    """
+    Raw upstream bodies, for reproducing a poll offline.
+
+    Bodies are stored gzipped under their SHA-256 (blobs/ab/abcd....gz), so a feed
+    that did not change is stored once however often it is fetched. index.jsonl has
+    one line per fetched body: time, poll, source, digest and size. Records older than
+    `max_age_days` are dropped, then the oldest ones until the blobs fit `max_bytes`.
+
+    Several processes write to it (the refresher, /news/stream passes in any worker,
+    the batch CLI), so every store and prune holds an exclusive flock on index.lock,
+    and pruning works from the index on disk. The fetcher does not keep the index in
+    memory: it only counts the blob bytes it adds, and prunes in a background thread
+    every `prune_interval` seconds or once that count passes `max_bytes`.
+    """
+
+    def __init__(self, root: str, max_age_days: float = ARCHIVE_MAX_AGE_DAYS, max_bytes: int = ARCHIVE_MAX_BYTES,
+                 prune_interval: float = ARCHIVE_PRUNE_INTERVAL_SEC):
+        self.root = root
+        self.index_path = os.path.join(root, INDEX_FILE)
+        self.max_age_sec = max_age_days * 86400
+        self.max_bytes = max_bytes
+        self.prune_interval = prune_interval
+        self._lock = threading.Lock()
+        self.poll: Optional[float] = None
+        self._open_polls = 0
+        # Blob bytes as of the last prune plus what this process stored since (None until the first prune)
+        self._stored_bytes: Optional[int] = None
+        self._last_prune = 0.0
+        self._prune_thread: Optional[threading.Thread] = None
+        # Index as read by replay/stats (never loaded by the fetcher)
+        self._records: Optional[List[Dict]] = None
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+
+    def _read_index(self, offset: int = 0):
+        """Records from byte `offset` on. Returns (records, offset reached, inode of the index file)."""
+        records = []
+        try:
+            with open(self.index_path, "rb") as f:
+                inode = os.fstat(f.fileno()).st_ino
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Being appended right now (or cut short by a crash)
+                    offset += len(line)
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            return records, 0, None
+        return records, offset, inode
+
+    @contextmanager
+    def _locked(self):
+        """This process's threads, then the other processes writing to the archive."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.root, LOCK_FILE), "a") as f:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, "blobs", digest[:2], f"{digest}.gz")
+
+    # --- Writing ---
+
+    def begin_poll(self, started: Optional[float] = None):
+        """
+        Bodies stored from now on belong to the poll that started at `started`. A poll
+        overlapping one already open (a /news/stream pass during a refresh) joins it.
+        """
+        with self._lock:
+            self._open_polls += 1
+            if self.poll is None:
+                self.poll = started or time.time()
+
+    def end_poll(self):
+        """Once the last open poll ends, start a background prune if one is due; the poll does not wait for it."""
+        with self._lock:
+            self._open_polls = max(0, self._open_polls - 1)
+            if self._open_polls:
+                return
+            self.poll = None
+        over_limit = self._stored_bytes is not None and self._stored_bytes > self.max_bytes
+        if not over_limit and time.time() - self._last_prune < self.prune_interval:
+            return
+        if self._prune_thread is not None and self._prune_thread.is_alive():
+            return
+        self._last_prune = time.time()
+        self._prune_thread = threading.Thread(target=self.prune, name="archive-prune", daemon=True)
+        self._prune_thread.start()
+
+    def store(self, source: Dict, body: bytes, page_url: Optional[str] = None, truncated: bool = False) -> Optional[str]:
+        """Archive one fetched body. Returns its digest, or None if it could not be written."""
+        if not body:
+            return None
+        digest = hashlib.sha256(body).hexdigest()
+        now = time.time()
+        record = {
+            "ts": round(now, 3),
+            "poll": round(self.poll or now, 3),
+            "source": {key: source.get(key) for key in ("name", "url", "type")},
+            "sha256": digest,
+            "bytes": len(body),
+            "truncated": truncated
+        }
+        if page_url and page_url != source.get("url"):
+            record["page_url"] = page_url
+        try:
+            with self._locked():
+                # Checked on disk: another process may have written or pruned it
+                path = self.blob_path(digest)
+                if os.path.exists(path):
+                    record["stored"] = os.path.getsize(path)
+                else:
+                    record["stored"] = self._write_blob(digest, body)
+                    if self._stored_bytes is not None:
+                        self._stored_bytes += record["stored"]
+                with open(self.index_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.warning(f"Archive: Could not store payload of {source.get('name')}: {e}")
+            return None
+        return digest
+
+    def _write_blob(self, digest: str, body: bytes) -> int:
+        path = self.blob_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = gzip.compress(body, compresslevel=6)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".blob-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return len(data)
+
+    def prune(self, now: Optional[float] = None):
+        """
+        Apply the age and size limits: rewrite the index and delete unreferenced blobs.
+        Works from the index on disk, so records of other writers are kept or dropped by the same rules.
+        The bulk of the index is read before taking the lock; stores only wait for the rewrite.
+        """
+        now = now or time.time()
+        records, offset, inode = self._read_index()
+        with self._locked():
+            try:
+                current = os.stat(self.index_path)
+            except FileNotFoundError:
+                current = None
+            if current is None or current.st_ino != inode or current.st_size < offset:
+                records = self._read_index()[0]  # Rewritten meanwhile by another process
+            else:
+                records.extend(self._read_index(offset)[0])
+            cutoff = now - self.max_age_sec
+            keep = [r for r in records if r["ts"] >= cutoff]
+            refs = Counter(r["sha256"] for r in keep)
+            sizes = {r["sha256"]: r.get("stored", 0) for r in keep}
+            total = sum(sizes.values())
+            limit = self.max_bytes * PRUNE_LOW_WATER if total > self.max_bytes else self.max_bytes
+            dropped = 0
+            while total > limit and dropped < len(keep):
+                digest = keep[dropped]["sha256"]
+                refs[digest] -= 1
+                if not refs[digest]:
+                    del refs[digest]
+                    total -= sizes[digest]
+                dropped += 1
+            keep = keep[dropped:]
+            self._stored_bytes = total
+            self._last_prune = time.time()
+            self._records = None
+            if len(keep) == len(records):
+                return
+
+            fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".index-")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    for record in keep:
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                os.replace(tmp_path, self.index_path)
+            except OSError as e:
+                logger.error(f"Archive: Index rewrite failed: {e}")
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                return
+            removed = 0
+            for digest in self._blob_digests():
+                if digest not in refs:
+                    try:
+                        os.unlink(self.blob_path(digest))
+                        removed += 1
+                    except FileNotFoundError:
+                        pass
+            logger.info(f"Archive: Pruned {len(records) - len(keep)} records and {removed} blobs "
+                        f"({total / 1024 / 1024:.1f} MB kept)")
+
+    def _blob_digests(self) -> List[str]:
+        digests = []
+        blob_dir = os.path.join(self.root, "blobs")
+        for prefix in os.listdir(blob_dir):
+            directory = os.path.join(blob_dir, prefix)
+            if os.path.isdir(directory):
+                digests.extend(name[:-3] for name in os.listdir(directory) if name.endswith(".gz"))
+        return digests
+
+    # --- Reading ---
+
+    def records(self) -> List[Dict]:
+        """The index, read on first use (replay and stats only)."""
+        if self._records is None:
+            self._records = self._read_index()[0]
+        return self._records
+
+    def load(self, digest: str) -> bytes:
+        """Raises FileNotFoundError if the blob was pruned (e.g. by another process) after the index was read."""
+        with open(self.blob_path(digest), "rb") as f:
+            return gzip.decompress(f.read())
+
+    def polls(self, since: Optional[float] = None, until: Optional[float] = None) -> List[float]:
+        """Start times of the archived polls in [since, until], oldest first."""
+        return sorted({r["poll"] for r in self.records()
+                       if (since is None or r["poll"] >= since) and (until is None or r["poll"] <= until)})
+
+    def state_at(self, poll: float) -> Dict[str, List[Dict]]:
+        """
+        What the pipeline had at a poll: per source URL, the records of its latest poll
+        up to `poll` (a source answering 304 kept the body it had fetched before).
+        """
+        latest: Dict[str, List[Dict]] = {}
+        for record in self.records():
+            if record["poll"] > poll:
+                continue
+            url = record["source"]["url"]
+            current = latest.get(url)
+            if current is None or record["poll"] > current[0]["poll"]:
+                latest[url] = [record]
+            elif record["poll"] == current[0]["poll"]:
+                current.append(record)
+        return latest
+
+    def stats(self) -> Dict:
+        records = self.records()
+        sizes = {r["sha256"]: r.get("stored", 0) for r in records}
+        return {
+            "records": len(records),
+            "polls": len({r["poll"] for r in records}),
+            "sources": len({r["source"]["url"] for r in records}),
+            "blobs": len(sizes),
+            "raw_mb": round(sum(r["bytes"] for r in records) / 1024 / 1024, 2),
+            "stored_mb": round(sum(sizes.values()) / 1024 / 1024, 2)
+        }
@@ -12,9 +12,12 @@ class Persistence:
         self.storage_path = storage_path
         self.data = {
             "subscribers": [],
-            "seen_links": []
+            "seen_links": [],
+            "prefs": {}
         }
         self.load()
+        # Files written before preferences existed
+        self.data.setdefault("prefs", {})
 
     def load(self):
         """Load data from file."""
@@ -54,6 +57,14 @@ class Persistence:
     def get_subscribers(self):
         return self.data["subscribers"]
 
+    # Subscriber Preferences (JSON object keys are strings)
+    def get_prefs(self, chat_id: int):
+        return self.data["prefs"].get(str(chat_id))
+
+    def set_prefs(self, chat_id: int, prefs: dict):
+        self.data["prefs"][str(chat_id)] = prefs
+        self.save()
+
     # Deduplication Logic
     def is_seen(self, link: str):
         return link in self.data["seen_links"]
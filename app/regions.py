@@ -0,0 +1,95 @@
+# app/regions.py
+import json
+import logging
+import os
+import re
+from typing import Dict, List, Optional
+
+from app.rss_sources import SOURCES, REGION_KEYWORDS, EXCLUDE_KEYWORDS, LOCALITY_KEYWORDS
+
+logger = logging.getLogger(__name__)
+
+# Additional region profiles (see regions.example.json). The built-in Ulytau profile always exists.
+REGIONS_FILE = os.getenv("REGIONS_FILE")
+DEFAULT_REGION_ID = "ulytau"
+REGION_ID_RE = re.compile(r"^[a-z0-9_-]+$")
+
+
+class RegionProfile:
+    """Keywords (lowercased), localities and sources that define one region's feed."""
+
+    def __init__(self, region_id: str, name: str, region_keywords: List[str], exclude_keywords: List[str],
+                 locality_keywords: Dict[str, List[str]], sources: List[Dict]):
+        self.id = region_id
+        self.name = name
+        self.region_keywords = [k.lower() for k in region_keywords]
+        self.exclude_keywords = [k.lower() for k in exclude_keywords]
+        self.locality_keywords = {
+            locality: [k.lower() for k in keywords] for locality, keywords in locality_keywords.items()
+        }
+        self.sources = sources
+        self.source_urls = {src["url"] for src in sources}
+
+    def describe(self) -> Dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "sources": len(self.sources),
+            "localities": list(self.locality_keywords)
+        }
+
+
+def default_profile(sources: Optional[List[Dict]] = None) -> RegionProfile:
+    return RegionProfile(DEFAULT_REGION_ID, "Ұлытау облысы", REGION_KEYWORDS, EXCLUDE_KEYWORDS, LOCALITY_KEYWORDS,
+                         SOURCES if sources is None else sources)
+
+
+def _resolve_sources(refs: List, known: Dict[str, Dict], region_id: str) -> List[Dict]:
+    """Source entries are either full source dicts or the name/url of a source in SOURCES (shared)."""
+    sources = []
+    for ref in refs:
+        if isinstance(ref, dict):
+            sources.append(ref)
+        elif ref in known:
+            sources.append(known[ref])
+        else:
+            logger.warning(f"Regions: Unknown source '{ref}' in region '{region_id}', skipped")
+    return sources
+
+
+def load_profiles(path: Optional[str] = REGIONS_FILE) -> List[RegionProfile]:
+    """The built-in profile first, then the regions of `path` (a region with the same id replaces it)."""
+    profiles = {DEFAULT_REGION_ID: default_profile()}
+    if not path:
+        return list(profiles.values())
+
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    known = {}
+    for src in SOURCES:
+        known[src["name"]] = src
+        known[src["url"]] = src
+    for region in config.get("regions", []):
+        region_id = region.get("id", "")
+        if not REGION_ID_RE.match(region_id):
+            logger.warning(f"Regions: Invalid region id '{region_id}', skipped")
+            continue
+        profiles[region_id] = RegionProfile(
+            region_id,
+            region.get("name", region_id),
+            region.get("region_keywords", []),
+            region.get("exclude_keywords", EXCLUDE_KEYWORDS),
+            region.get("localities", {}),
+            _resolve_sources(region.get("sources", SOURCES), known, region_id)
+        )
+    logger.info(f"Regions: Loaded {len(profiles)} region profiles from {path}")
+    return list(profiles.values())
+
+
+def shared_sources(profiles: List[RegionProfile]) -> List[Dict]:
+    """Union of every region's sources, each URL once: that is all the fetch layer polls."""
+    sources = {}
+    for profile in profiles:
+        for src in profile.sources:
+            sources.setdefault(src["url"], src)
+    return list(sources.values())
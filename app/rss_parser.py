@@ -1,122 +1,161 @@
 # app/rss_parser.py
-import feedparser
+import argparse
+import csv
+import json
 import logging
 import os
+import sys
+import tempfile
 import requests
 import time
+import threading
 import certifi
-import re
 import concurrent.futures
-from bs4 import BeautifulSoup
-from typing import List, Dict, Any, Tuple, Optional
+import concurrent.futures.process
+import multiprocessing
+from collections import deque
+from typing import List, Dict, Any, Iterator, Tuple, Optional
 from datetime import datetime, timedelta, timezone
 from dateutil import parser as date_parser
 
 # Import configuration and helpers
-from app.rss_sources import SOURCES, REGION_KEYWORDS, EXCLUDE_KEYWORDS
+from app.regions import RegionProfile, default_profile, load_profiles, shared_sources
 from app.law_detector import LawDetector
 from app.summarizer import NewsSummarizer
 from app.circuit_breaker import CircuitBreaker
+from app.news_item import Entry, NewsItem
+from app.scoring import ImportanceScorer, CATEGORY_CODES
+from app.host_limiter import (HOST_MAX_CONCURRENCY, HOST_MAX_WAIT_SEC, HOST_MIN_INTERVAL_SEC,
+                              HostLimiter, RateLimited, host_of, parse_retry_after)
+from app.payload_archive import ARCHIVE_DIR, PayloadArchive, tee_chunks
+from app import source_parsers
+from app.source_parsers import MAX_SOURCE_BYTES
 
 logger = logging.getLogger(__name__)
 
+# Circuit breaker tuning (overridable for load tests against mock_upstream.py)
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "3"))
+BREAKER_RECOVERY_SEC = int(os.getenv("BREAKER_RECOVERY_SEC", "1800"))
+
+# Items older than this are dropped (and stop streaming feed parsing early)
+FRESHNESS_DAYS = 7
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Parse stage process pool. 0 = parse inline in the fetch threads.
+# Default leaves one core for the API / network threads.
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(max(0, (os.cpu_count() or 1) - 1))))
+# A full poll batches small payloads into one pool task up to this many bytes (amortizes IPC)
+PARSE_CHUNK_BYTES = int(os.getenv("PARSE_CHUNK_BYTES", str(512 * 1024)))
+
+# Back-off for a 429 without Retry-After, and the longest Retry-After honoured
+DEFAULT_RETRY_AFTER_SEC = 60
+MAX_RETRY_AFTER_SEC = 900
+
+# Fetch threads (kept across polls, so attempts past the deadline can finish)
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", "16"))
+# A poll returns after this long with whatever arrived; late sources serve their last entries
+FETCH_DEADLINE_SEC = float(os.getenv("FETCH_DEADLINE_SEC", "10"))
+# A second (hedged) request is sent when an attempt runs past the source's p95 latency,
+# measured over the last LATENCY_WINDOW successful fetches (never before HEDGE_MIN_SEC)
+LATENCY_WINDOW = 20
+HEDGE_MIN_SAMPLES = 5
+HEDGE_MIN_SEC = float(os.getenv("HEDGE_MIN_SEC", "1.0"))
+
+# Telegram channels are scraped incrementally by post id.
+# After downtime, up to this many older pages (?before=<id>) are fetched to close the gap.
+TELEGRAM_BACKFILL_PAGES = int(os.getenv("TELEGRAM_BACKFILL_PAGES", "3"))
+# Parsed posts kept per channel (and re-emitted every poll while fresh)
+TELEGRAM_CACHE_POSTS = 200
+
 class RSSParser:
-    def __init__(self):
-        self.sources = SOURCES
-        self.region_keywords = [k.lower() for k in REGION_KEYWORDS]
-        self.exclude_keywords = [k.lower() for k in EXCLUDE_KEYWORDS]
+    def __init__(self, sources: Optional[List[Dict]] = None, regions: Optional[List[RegionProfile]] = None):
+        # Region profiles share one fetch layer: every source URL is polled once per cycle,
+        # then each region filters and scores the entries of its own sources.
+        if regions is None:
+            regions = load_profiles() if sources is None else [default_profile(sources)]
+        self.regions = {profile.id: profile for profile in regions}
+        self.profile = regions[0]  # Default region: /news, digest, search, bot
+        self.sources = shared_sources(regions)
+        self.region_keywords = self.profile.region_keywords
+        self.exclude_keywords = self.profile.exclude_keywords
+        self.locality_keywords = self.profile.locality_keywords
         
         self.law_detector = LawDetector()
         self.summarizer = NewsSummarizer()
+        self.scorer = ImportanceScorer()
         
         # Circuit Breaker Registry: { source_url: CircuitBreakerInstance }
         self.breakers = {
-            src["url"]: CircuitBreaker(failure_threshold=3, recovery_timeout=1800) 
+            src["url"]: CircuitBreaker(failure_threshold=BREAKER_FAILURE_THRESHOLD, recovery_timeout=BREAKER_RECOVERY_SEC) 
             for src in self.sources
         }
         
         # State storage for debug endpoint
         self.source_statuses = {} 
 
+        # Conditional GET cache: { source_url: {"etag", "last_modified", "entries"} }
+        self.validators = {}
+
+        # Telegram channels: { source_url: {"last_id": int, "posts": [[post_id, title, link, summary, published], ...]} }
+        self.telegram_state = {}
+
+        # Recent fetch times per source, for hedging: { source_url: deque[ms] }
+        self.latencies: Dict[str, deque] = {}
+        # Guards the race dicts shared by the hedged attempts of one source
+        self._race_lock = threading.Lock()
+        # Last entries of each source (also from attempts that finished after their poll)
+        self.last_entries: Dict[str, List[Entry]] = {}
+        # Latest attempts per source; running ones are joined by overlapping polls: { source_url: [Future] }
+        self._inflight: Dict[str, List[concurrent.futures.Future]] = {}
+        self._inflight_lock = threading.Lock()
+        self._fetch_pool = None
+        self._fetch_pool_lock = threading.Lock()
+
+        # Politeness limits per upstream host (Telegram and Google News serve many sources)
+        self.host_limiter = HostLimiter(HOST_MAX_CONCURRENCY, HOST_MIN_INTERVAL_SEC, MAX_RETRY_AFTER_SEC)
+
+        # Raw bodies, content-addressed, for offline replay (off unless ARCHIVE_DIR is set)
+        self.archive = PayloadArchive(ARCHIVE_DIR) if ARCHIVE_DIR else None
+
+        # Parse stage process pool (created on first use)
+        self.parse_workers = PARSE_WORKERS
+        self._parse_pool = None
+        self._parse_pool_lock = threading.Lock()
+
     def clean_text(self, text: str) -> str:
         """Clean HTML and remove unwanted urls/spaces."""
-        if not text: return ""
-        soup = BeautifulSoup(text, "html.parser")
-        text = soup.get_text(separator=" ", strip=True)
-        text = re.sub(r'https?://\S+\.(?:jpg|jpeg|png|webp|gif)\S*', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'https?://img\S+', '', text, flags=re.IGNORECASE)
-        text = ' '.join(text.split())
-        return text
+        return source_parsers.clean_text(text)
 
     def is_relevant(self, text: str) -> bool:
         """Strict filtering: Text MUST contain at least one region keyword."""
         text_lower = text.lower()
         return any(k in text_lower for k in self.region_keywords)
 
-    def calculate_importance(self, title: str, summary: str, content_type: str, published_str: str) -> int:
-        """
-        Calculates news score (1 to 5).
-        +5: Constitution (Auto-Max)
-        +2: Keyword in title
-        +2: Is a Law/Act
-        +1: >3 mentions of region in text
-        +1: Fresh news (< 24 hours)
-        """
-        if content_type == "constitution":
-            return 5
-            
-        score = 1 # Base score
-        full_text = f"{title} {summary}"
-        full_text_lower = full_text.lower()
-        
-        # 1. Keyword in Title (+2)
-        title_lower = title.lower()
-        if any(k in title_lower for k in self.region_keywords):
-            score += 2
-            
-        # 2. Is Law (+2 boost for laws, as they are high priority)
-        if content_type == "law":
-            score += 2
-            
-        # 3. Multiple mentions (+1)
-        mentions = sum(full_text_lower.count(k) for k in self.region_keywords)
-        if mentions > 3:
-            score += 1
-            
-        # 4. Freshness (+1 if < 24 hours)
-        try:
-            if published_str:
-                pub_date = date_parser.parse(published_str)
-                if pub_date.tzinfo is None:
-                    pub_date = pub_date.replace(tzinfo=timezone.utc)
-                
-                now = datetime.now(timezone.utc)
-                if now - pub_date < timedelta(hours=24):
-                    score += 1
-            # REMOVED: Automatic +1 for HTML news without dates.
-            # If no date is found, we don't grant freshness bonus to be safe.
-        except:
-            pass
-            
-        return min(score, 5)
+    def detect_localities(self, text_lower: str, profile: Optional[RegionProfile] = None) -> List[str]:
+        """Ids of the localities a (lowercased) text mentions; empty for region-wide news."""
+        locality_keywords = (profile or self.profile).locality_keywords
+        return [loc for loc, keywords in locality_keywords.items() if any(k in text_lower for k in keywords)]
 
-    def fetch_source(self, source: Dict) -> List[Dict]:
-        """Fetch a single source with Circuit Breaker protection."""
-        start_t = time.time()
+    def _start_status(self, source: Dict):
+        """Build the status record for a poll of `source`. Returns (status, breaker, allowed)."""
         source_name = source.get("name", "Unknown")
         source_url = source.get("url")
-        source_type = source.get("type", "rss")
-        
         breaker = self.breakers.get(source_url)
         
         result_status = {
             "name": source_name,
             "url": source_url,
-            "type": source_type,
+            "type": source.get("type", "rss"),
             "ok": False,
             "entries_count": 0,
             "error": None,
             "elapsed_ms": 0,
+            "not_modified": False,
+            "bytes": 0,
+            "truncated": False,
+            "stopped_early": False,
+            "rate_limited": False,
+            "retry_after": 0,
             "circuit": breaker.state.value if breaker else "N/A"
         }
         
@@ -125,165 +164,601 @@ class RSSParser:
             logger.info(f"CircuitBreaker: Skipping {source_name} (State: OPEN)")
             result_status["error"] = "Circuit Breaker OPEN"
             self.source_statuses[source_url] = result_status
-            return []
+            return result_status, breaker, False
+        return result_status, breaker, True
+
+    def _finish_status(self, source_url: str, result_status: Dict, start_t: float,
+                       race: Optional[Dict] = None) -> bool:
+        """
+        Publish the status of a finished attempt and feed its latency into the p95 window.
+        Of hedged attempts (`race`), only the first success publishes; a failure publishes
+        only once every attempt has failed. Returns whether this attempt published.
+        """
+        result_status["elapsed_ms"] = int((time.time() - start_t) * 1000)
+        if race is not None:
+            with self._race_lock:
+                if result_status["ok"]:
+                    publish = not race["won"]
+                    race["won"] = True
+                else:
+                    race["failed"] += 1
+                    publish = not race["won"] and race["failed"] >= race["attempts"]
+            if not publish:
+                return False
+        if result_status["ok"]:
+            self.latencies.setdefault(source_url, deque(maxlen=LATENCY_WINDOW)).append(result_status["elapsed_ms"])
+        self.source_statuses[source_url] = result_status
+        return True
 
-        entries = []
+    def latency_p95(self, source_url: str) -> Optional[float]:
+        """p95 of recent successful fetch times (ms), None until enough samples."""
+        samples = sorted(self.latencies.get(source_url, ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    def _request(self, source: Dict):
+        """Open a streamed conditional GET for `source`. Returns (response, cached validators)."""
+        source_url = source.get("url")
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
         }
+        # HTML listing pages are expected to be light, so they get a tighter timeout
+        timeout = 5 if source.get("type", "rss") == "html_list" else 6
 
+        # Send validators from the last good response so unchanged sources answer 304
+        cached = self.validators.get(source_url)
+        if cached:
+            if cached.get("etag"): headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"): headers["If-Modified-Since"] = cached["last_modified"]
+
+        # Streamed so feeds can be abandoned early and the byte budget enforced.
+        # The host slot is held until the response headers arrive.
+        host = host_of(source_url)
+        with self.host_limiter.slot(host, HOST_MAX_WAIT_SEC):
+            response = requests.get(source_url, headers=headers, timeout=timeout, verify=certifi.where(), stream=True)
+
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        if response.status_code == 429 or (response.status_code == 503 and retry_after is not None):
+            response.close()
+            retry_after = DEFAULT_RETRY_AFTER_SEC if retry_after is None else retry_after
+            self.host_limiter.defer(host, retry_after)
+            raise RateLimited(host, retry_after)
         try:
-            # Fetch logic...
-            if source_type in ["rss", "google_rss"]:
-                response = requests.get(source_url, headers=headers, timeout=6, verify=certifi.where())
-                response.raise_for_status()
-                feed = feedparser.parse(response.content)
-                for entry in feed.entries:
-                    entries.append({
-                        "title": entry.get("title", ""),
-                        "link": entry.get("link", ""),
-                        "summary": entry.get("summary", entry.get("description", "")),
-                        "published": entry.get("published", ""),
-                        "source_name": source_name
-                    })
-
-            elif source_type == "html_list":
-                response = requests.get(source_url, headers=headers, timeout=5, verify=certifi.where())
-                response.raise_for_status()
-                soup = BeautifulSoup(response.content, "html.parser")
-                links = soup.find_all('a', href=True)
-                valid_count = 0
-                for a in links:
-                    if valid_count >= 10: break # More candidates, but filter strictly
-                    t = self.clean_text(a.get_text())
-                    if len(t) < 25: continue
-                    link = a['href']
-                    if "gov.kz" in source_url and "/press/news/" not in link: continue
-                    if link.startswith("/"):
-                        link = ("https://www.gov.kz" if "gov.kz" in source_url else "https://news20.kz") + link
-                    
-                    # --- IMPROVED HTML Date Extraction ---
-                    pub_date = ""
-                    # Search up to 4 parents for metadata container
-                    parent = a
-                    for _ in range(4):
-                        parent = parent.parent
-                        if not parent: break
-                        
-                        # 1. Look for <time> tag
-                        time_tag = parent.find("time")
-                        if time_tag:
-                            pub_date = time_tag.get("datetime") or time_tag.get_text()
-                            break
-                        
-                        # 2. Look for common date classes
-                        date_el = parent.find(class_=re.compile(r"date|time|bi_date_pub", re.I))
-                        if date_el:
-                            pub_date = date_el.get_text()
-                            break
-                            
-                        # 3. Fallback: Regex in parent text
-                        date_match = re.search(r'(\d{2}\.\d{2}\.\d{4})', parent.get_text())
-                        if date_match:
-                            pub_date = date_match.group(1)
-                            break
-                    
-                    entries.append({
-                        "title": t, 
-                        "link": link, 
-                        "summary": t, 
-                        "published": pub_date, 
-                        "source_name": source_name
-                    })
-                    valid_count += 1
-
-            elif source_type == "telegram":
-                response = requests.get(source_url, headers=headers, timeout=6, verify=certifi.where())
-                response.raise_for_status()
-                soup = BeautifulSoup(response.content, "html.parser")
-                
-                # Telegram Web wraps messages in tgme_widget_message_wrap
-                msgs = soup.find_all("div", class_="tgme_widget_message_wrap")
-                
-                for wrap in msgs:
-                    msg_div = wrap.find("div", class_="tgme_widget_message")
-                    if not msg_div: continue
-                    
-                    # Text content
-                    text_div = msg_div.find("div", class_="tgme_widget_message_text")
-                    if not text_div:
-                        # Maybe it is a photo-only post or album without caption?
-                        # Using text detection from any part if main text block missing?
-                        # For now, skip empty text posts as they lack context for filtering
-                        continue
-                        
-                    raw_text = text_div.get_text(separator=" ", strip=True)
-                    if len(raw_text) < 10: continue # Skip very short/empty messages
-                    
-                    cleaned_text = self.clean_text(raw_text)
-                    
-                    # Link
-                    link_node = msg_div.find("a", class_="tgme_widget_message_date")
-                    link = link_node["href"] if link_node else ""
-                    
-                    # Date
-                    time_node = msg_div.find("time", class_="time")
-                    pub_date = ""
-                    if time_node and time_node.has_attr("datetime"):
-                        pub_date = time_node["datetime"]
-                    
-                    entries.append({
-                        "title": cleaned_text[:100] + "..." if len(cleaned_text) > 100 else cleaned_text,
-                        "link": link,
-                        "summary": cleaned_text,
-                        "published": pub_date,
-                        "source_name": source_name
-                    })
+            response.raise_for_status()
+        except requests.HTTPError:
+            # Unread error bodies keep their connection out of the pool until closed
+            response.close()
+            raise
+        return response, cached
+
+    def _rate_limited(self, source: Dict, result_status: Dict, error: RateLimited) -> List[Entry]:
+        """
+        Back-off is not a source failure: the breaker is left alone and the entries
+        of the last good response (if any) are served for this poll.
+        """
+        result_status["rate_limited"] = True
+        result_status["retry_after"] = int(error.retry_after)
+        result_status["error"] = str(error)
+        logger.info(f"Source {source.get('name', 'Unknown')}: {error}")
+        cached = self.validators.get(source.get("url"))
+        entries = list(cached["entries"]) if cached else []
+        result_status["entries_count"] = len(entries)
+        return entries
+
+    def _remember(self, source_url: str, etag: Optional[str], last_modified: Optional[str], entries: List[Entry]):
+        """Keep validators and parsed entries so a later 304 can reuse them."""
+        if etag or last_modified:
+            self.validators[source_url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "entries": entries
+            }
+
+    def fetch_telegram(self, source: Dict, result_status: Dict, horizon: datetime) -> List[Entry]:
+        """
+        Incremental channel scrape: only posts newer than the last seen id are parsed.
+        If none of the page's posts were known (gap after downtime), older pages are
+        requested with ?before=<oldest id on the page> until the gap closes.
+        Returns every cached post of the channel that is still fresh.
+        """
+        source_url = source.get("url")
+        state = self.telegram_state.get(source_url) or {"last_id": 0, "posts": []}
+        last_id = state["last_id"]
+
+        response, cached = self._request(source)
+        with response:
+            if response.status_code == 304 and cached:
+                result_status["not_modified"] = True
+                return list(cached["entries"])
+            content = self._read_limited(response, result_status)
+            etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if self.archive:
+            self.archive.store(source, content, truncated=result_status["truncated"])
+        new_posts, stats = source_parsers.parse_telegram_page(content, after_id=last_id)
+        max_id = stats["max_id"]
+
+        backfill_pages = 0
+        oldest = stats["min_id"]
+        while last_id and oldest > last_id + 1 and backfill_pages < TELEGRAM_BACKFILL_PAGES:
+            if new_posts and self._is_stale(new_posts[0][1][3], horizon):
+                break
+            separator = "&" if "?" in source_url else "?"
+            page_source = dict(source, url=f"{source_url}{separator}before={oldest}")
+            # A failed backfill page only ends the backfill: the first page's posts and id are kept
+            try:
+                response, _ = self._request(page_source)
+                with response:
+                    content = self._read_limited(response, {})
+                if self.archive:
+                    self.archive.store(source, content, page_url=page_source["url"])
+                older, page_stats = source_parsers.parse_telegram_page(content, after_id=last_id, before_id=oldest)
+            except RateLimited:
+                break
+            except Exception as e:
+                logger.warning(f"Telegram: Backfill page before={oldest} of {source.get('name')} failed: {e}")
+                result_status["backfill_error"] = str(e)
+                break
+            backfill_pages += 1
+            if not older or page_stats["min_id"] >= oldest:
+                break
+            new_posts = older + new_posts
+            oldest = page_stats["min_id"]
+
+        # Merge with cached posts, newest last; drop stale ones and cap the cache
+        merged = {post[0]: post for post in state["posts"]}
+        for post_id, entry in new_posts:
+            merged[post_id] = [post_id, *entry]
+        posts = [merged[i] for i in sorted(merged) if not self._is_stale(merged[i][4], horizon)][-TELEGRAM_CACHE_POSTS:]
+        self.telegram_state[source_url] = {"last_id": max(last_id, max_id), "posts": posts}
+
+        result_status["new_posts"] = len(new_posts)
+        result_status["backfill_pages"] = backfill_pages
+        entries = self._to_entries([post[1:] for post in posts], source.get("name", "Unknown"))
+        self._remember(source_url, etag, last_modified, entries)
+        return entries
+
+    @staticmethod
+    def _is_stale(published: str, horizon: datetime) -> bool:
+        try:
+            dt = date_parser.parse(published)
+        except (ValueError, OverflowError, TypeError):
+            return False
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt < horizon
+
+    def _to_entries(self, tuples, source_name: str) -> List[Entry]:
+        return [Entry(t[0], t[1], t[2], t[3], source_name) for t in tuples]
+
+    def fetch_source(self, source: Dict) -> List[Entry]:
+        """Fetch and parse a single source in the calling thread, with Circuit Breaker protection."""
+        return self._fetch_source(source)[0]
+
+    def download_source(self, source: Dict) -> Optional[Dict]:
+        """
+        Network stage only (used with the parse process pool).
+        Returns {"source", "entries"} for a 304, {"source", "body", "etag", "last_modified"}
+        for a fresh body, or None if the source failed or its breaker is open.
+        """
+        return self._download_source(source)[0]
+
+    def _fetch_source(self, source: Dict, race: Optional[Dict] = None) -> Tuple[List[Entry], Dict]:
+        payload, result_status = self._poll_source(source, race, parse=True)
+        return (payload["entries"] if payload else []), result_status
+
+    def _download_source(self, source: Dict, race: Optional[Dict] = None) -> Tuple[Optional[Dict], Dict]:
+        return self._poll_source(source, race, parse=False)
+
+    def _poll_source(self, source: Dict, race: Optional[Dict], parse: bool) -> Tuple[Optional[Dict], Dict]:
+        """
+        One attempt at a source: breaker check, fetch, status and breaker bookkeeping.
+        Returns (payload, status); the payload is None if the source failed or its breaker is open.
+        """
+        start_t = time.time()
+        source_name = source.get("name", "Unknown")
+        source_url = source.get("url")
+        result_status, breaker, allowed = self._start_status(source)
+        if not allowed:
+            return None, result_status
+
+        payload = None
+        failed = False
+        horizon = datetime.now(timezone.utc) - timedelta(days=FRESHNESS_DAYS)
+
+        try:
+            if source.get("type") == "telegram":
+                # Only posts newer than the last seen id are parsed, cheap enough for a fetch thread
+                payload = {"source": source, "entries": self.fetch_telegram(source, result_status, horizon)}
+            else:
+                payload = self._fetch_body(source, result_status, horizon, parse)
+            if result_status["truncated"]:
+                logger.warning(f"Source {source_name} exceeded {MAX_SOURCE_BYTES} bytes, truncated")
 
             result_status["ok"] = True
-            result_status["entries_count"] = len(entries)
+            if "entries" in payload:
+                result_status["entries_count"] = len(payload["entries"])
             if breaker: breaker.record_success()
 
+        except RateLimited as e:
+            payload = {"source": source, "entries": self._rate_limited(source, result_status, e)}
         except Exception as e:
             result_status["error"] = str(e)
-            if breaker: breaker.record_failure()
+            failed = True
             logger.warning(f"Source {source_name} failed: {e}")
-            
-        result_status["elapsed_ms"] = int((time.time() - start_t) * 1000)
-        self.source_statuses[source_url] = result_status
-        return entries
 
-    def fetch_news(self) -> List[Dict[str, Any]]:
-        """Fetch, filter, and score news. Sorted by importance."""
-        all_raw_entries = []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_source = {executor.submit(self.fetch_source, src): src for src in self.sources}
-            done, not_done = concurrent.futures.wait(future_to_source.keys(), timeout=10)
-            for future in done:
+        published = self._finish_status(source_url, result_status, start_t, race)
+        # The loser of a hedged pair is not a source failure
+        if failed and published and breaker: breaker.record_failure()
+        return payload, result_status
+
+    def _fetch_body(self, source: Dict, result_status: Dict, horizon: datetime, parse: bool) -> Dict:
+        """
+        Conditional GET of a feed or listing page. Returns {"source", "entries"} for a 304 or
+        when `parse`, otherwise the raw body for the parse pool: {"source", "body", "etag", "last_modified"}.
+        """
+        source_name = source.get("name", "Unknown")
+        response, cached = self._request(source)
+        with response:
+            if response.status_code == 304 and cached:
+                result_status["not_modified"] = True
+                return {"source": source, "entries": list(cached["entries"])}
+            etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+            entries = None
+            if source.get("type", "rss") in ["rss", "google_rss"]:
+                chunks = response.iter_content(STREAM_CHUNK_SIZE)
+                if parse:
+                    consumed = bytearray()
+                    if self.archive:
+                        chunks = tee_chunks(chunks, consumed)
+                    tuples, stream_stats = source_parsers.parse_feed(source, chunks, horizon, MAX_SOURCE_BYTES)
+                    entries = self._to_entries(tuples, source_name)
+                    # What the parser read (a stream stopped early is archived up to that point)
+                    content = bytes(consumed)
+                else:
+                    # Stops at the same run of stale entries as the stream parse
+                    content, stream_stats = source_parsers.read_feed(source, chunks, horizon, MAX_SOURCE_BYTES)
+                result_status["bytes"] = stream_stats["bytes"]
+                result_status["truncated"] = stream_stats["truncated"]
+                result_status["stopped_early"] = stream_stats["stopped_early"]
+            else:
+                content = self._read_limited(response, result_status)
+                if parse:
+                    entries = self.parse_source(source, content)
+            if self.archive:
+                self.archive.store(source, content, truncated=result_status["truncated"])
+
+        if entries is None:
+            return {"source": source, "body": content, "etag": etag, "last_modified": last_modified}
+        self._remember(source.get("url"), etag, last_modified, entries)
+        return {"source": source, "entries": entries}
+
+    def _read_limited(self, response, result_status: Dict) -> bytes:
+        """Read a streamed response body, stopping at MAX_SOURCE_BYTES."""
+        body = bytearray()
+        for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+            body.extend(chunk)
+            if len(body) >= MAX_SOURCE_BYTES:
+                del body[MAX_SOURCE_BYTES:]
+                result_status["truncated"] = True
+                break
+        result_status["bytes"] = len(body)
+        return bytes(body)
+
+    def parse_source(self, source: Dict, content: bytes, horizon: Optional[datetime] = None) -> List[Entry]:
+        """
+        Parse a downloaded payload into raw entries.
+        Kept separate from the network call so recorded payloads can be replayed offline.
+        """
+        tuples = source_parsers.parse_payload(source, content, horizon)
+        return self._to_entries(tuples, source.get("name", "Unknown"))
+
+    def _get_parse_pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        with self._parse_pool_lock:
+            if self._parse_pool is None:
+                # spawn: forking a process that already runs server threads is not safe
+                self._parse_pool = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.parse_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._parse_pool
+
+    def _drop_parse_pool(self):
+        # A worker died (OOM, signal): the next submit starts a new pool
+        logger.error("Parse pool broken, parsing inline")
+        with self._parse_pool_lock:
+            self._parse_pool = None
+
+    def _submit_parse(self, payloads: List[Dict], horizon: datetime) -> concurrent.futures.Future:
+        """Parse stage: hand downloaded bodies to the process pool as one task."""
+        jobs = [(p["source"], p["body"], horizon) for p in payloads]
+        try:
+            return self._get_parse_pool().submit(source_parsers.parse_batch, jobs)
+        except concurrent.futures.process.BrokenProcessPool:
+            self._drop_parse_pool()
+            future = concurrent.futures.Future()
+            future.set_result(source_parsers.parse_batch(jobs))
+            return future
+
+    def _collect_parse(self, future: concurrent.futures.Future, payloads: List[Dict],
+                       horizon: datetime) -> Dict[str, List[Entry]]:
+        """Entries by source URL of a finished parse task; statuses, breakers and validators are updated."""
+        try:
+            results = future.result()
+        except concurrent.futures.process.BrokenProcessPool:
+            self._drop_parse_pool()
+            results = source_parsers.parse_batch([(p["source"], p["body"], horizon) for p in payloads])
+        except Exception as e:
+            results = [(p["source"]["url"], None, str(e)) for p in payloads]
+
+        by_url = {p["source"]["url"]: p for p in payloads}
+        entries_by_url = {}
+        for source_url, tuples, error in results:
+            payload = by_url[source_url]
+            source = payload["source"]
+            status = self.source_statuses.get(source_url, {})
+            if error is not None:
+                status["ok"] = False
+                status["error"] = f"Parse error: {error}"
+                breaker = self.breakers.get(source_url)
+                if breaker: breaker.record_failure()
+                logger.warning(f"Source {source.get('name')} parse failed: {error}")
+                continue
+            entries = self._to_entries(tuples, source.get("name", "Unknown"))
+            self._remember(source_url, payload["etag"], payload["last_modified"], entries)
+            self.last_entries[source_url] = entries
+            status["entries_count"] = len(entries)
+            entries_by_url[source_url] = entries
+        return entries_by_url
+
+    def _get_fetch_pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._fetch_pool_lock:
+            if self._fetch_pool is None:
+                self._fetch_pool = concurrent.futures.ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="fetch")
+            return self._fetch_pool
+
+    @staticmethod
+    def _outcome(future: concurrent.futures.Future):
+        """(result, status) of a finished attempt."""
+        try:
+            return future.result()
+        except Exception as e:
+            return None, {"ok": False, "rate_limited": False, "error": str(e)}
+
+    def _store_late(self, source: Dict, future: concurrent.futures.Future):
+        """Done-callback for attempts that missed their poll: keep the result for the next one."""
+        result, status = self._outcome(future)
+        if not status.get("ok") or result is None:
+            return
+        if isinstance(result, dict):
+            if "body" in result:
                 try:
-                    all_raw_entries.extend(future.result())
-                except: pass
-            for future in not_done: future.cancel()
+                    entries = self.parse_source(source, result["body"])
+                except Exception as e:
+                    logger.warning(f"Source {source.get('name')} late parse failed: {e}")
+                    return
+                self._remember(source["url"], result["etag"], result["last_modified"], entries)
+            else:
+                entries = result["entries"]
+        else:
+            entries = result
+        self.last_entries[source["url"]] = entries
+        logger.info(f"Source {source.get('name')}: late result stored ({len(entries)} entries)")
 
-        processed_news = []
+    def iter_fetch(self) -> Iterator[Tuple[Dict, Any]]:
+        """
+        Run one attempt per source on the fetch pool and yield (source, result) in the
+        order sources complete; result is an entries list, or a download payload with
+        a parse pool (None if the source failed).
+
+        An attempt running past its source's p95 latency gets one hedged duplicate;
+        the first successful attempt wins. Sources still running at FETCH_DEADLINE_SEC
+        are yielded with their last entries, and their attempts keep running to refresh them.
+
+        Polls may overlap (a refresh and /news/stream passes): a source another poll is
+        already fetching is joined, not requested again, so each source has one attempt
+        (plus its hedge) updating its breaker, validators and cursor at a time.
+        """
+        fetch = self._download_source if self.parse_workers > 0 else self._fetch_source
+        pool = self._get_fetch_pool()
+        started = time.time()
+        deadline = started + FETCH_DEADLINE_SEC
+        if self.archive:
+            self.archive.begin_poll(started)
+        try:
+            yield from self._run_poll(fetch, pool, started, deadline)
+        finally:
+            if self.archive:
+                self.archive.end_poll()
+
+    def _run_poll(self, fetch, pool: concurrent.futures.ThreadPoolExecutor, started: float,
+                  deadline: float) -> Iterator[Tuple[Dict, Any]]:
+        sources = {src["url"]: src for src in self.sources}
+        attempts: Dict[str, List[concurrent.futures.Future]] = {}
+        races: Dict[str, Dict] = {}
+        hedge_at: Dict[str, float] = {}
+        joined = set()
+        with self._inflight_lock:
+            for url, src in sources.items():
+                # Busy for another poll (or late from an earlier one): wait for that attempt
+                running = [f for f in self._inflight.get(url, []) if not f.done()]
+                races[url] = {"won": False, "attempts": 1, "failed": 0}
+                if running:
+                    attempts[url] = running
+                    joined.add(url)
+                    continue
+                # Registered as is: a hedge appended below is visible to other polls too
+                attempts[url] = self._inflight[url] = [pool.submit(fetch, src, races[url])]
+                p95 = self.latency_p95(url)
+                if p95 is not None:
+                    hedge_at[url] = started + max(p95 / 1000, HEDGE_MIN_SEC)
+
+        done = set()
+        hedged = 0
+        while True:
+            for url, futures in attempts.items():
+                if url in done:
+                    continue
+                finished = [self._outcome(f) for f in futures if f.done()]
+                winner = next((r for r, st in finished if st.get("ok")), None)
+                if winner is not None:
+                    done.add(url)
+                    # Entries that came back without going through the parse pool
+                    entries = winner.get("entries") if isinstance(winner, dict) else winner
+                    if entries is not None:
+                        self.last_entries[url] = entries
+                    yield sources[url], winner
+                elif finished and len(finished) == len(futures):
+                    done.add(url)
+                    yield sources[url], finished[-1][0]
+            pending = [url for url in attempts if url not in done]
+            now = time.time()
+            if not pending or now >= deadline:
+                break
+
+            for url in pending:
+                if url in hedge_at and now >= hedge_at[url] and len(attempts[url]) == 1 \
+                        and not self.host_limiter.blocked_for(host_of(url)):
+                    with self._race_lock:
+                        races[url]["attempts"] += 1
+                    with self._inflight_lock:
+                        attempts[url].append(pool.submit(fetch, sources[url], races[url]))
+                    hedged += 1
+            next_hedge = min((hedge_at[url] for url in pending if url in hedge_at and len(attempts[url]) == 1), default=deadline)
+            waiting = [f for url in pending for f in attempts[url] if not f.done()]
+            concurrent.futures.wait(waiting, timeout=max(0.0, min(next_hedge, deadline) - now),
+                                    return_when=concurrent.futures.FIRST_COMPLETED)
+
+        late = [url for url in attempts if url not in done]
+        for url in late:
+            source = sources[url]
+            entries = self.last_entries.get(url) or (self.validators.get(url) or {}).get("entries", [])
+            status = dict(self.source_statuses.get(url) or {"name": source.get("name", "Unknown"), "url": url, "ok": False})
+            status.update(late=True, entries_count=len(entries), error=f"Still running after {FETCH_DEADLINE_SEC:.0f}s deadline")
+            self.source_statuses[url] = status
+            # The poll that started an attempt hits its deadline first and adds the callback
+            if url not in joined:
+                for future in [f for f in attempts[url] if not f.done()]:
+                    future.add_done_callback(lambda f, source=source: self._store_late(source, f))
+            yield source, {"source": source, "entries": list(entries)} if self.parse_workers > 0 else list(entries)
+
+        if hedged or late:
+            logger.info(f"Fetch: {len(done)}/{len(attempts)} sources by the deadline, "
+                        f"{hedged} hedged, {len(late)} late (served last entries) in {time.time() - started:.1f}s")
+
+    def iter_news(self, profile: Optional[RegionProfile] = None) -> Iterator[Tuple[Dict, List[NewsItem]]]:
+        """
+        Progressive fetch_news: yields (source, accepted items) as each source completes.
+        Items are filtered, scored and summarized per source; a link already yielded
+        for an earlier source is skipped.
+        """
+        profile = profile or self.profile
+        now = datetime.now(timezone.utc)
+        horizon = now - timedelta(days=FRESHNESS_DAYS)
         seen_links = set()
-        
+        # Bodies being parsed in the pool while the other sources download: { future: payload }
+        parsing: Dict[concurrent.futures.Future, Dict] = {}
+
+        def accepted(raw_entries: List[Entry]) -> List[NewsItem]:
+            raw_entries = [e for e in raw_entries if e.link not in seen_links]
+            seen_links.update(e.link for e in raw_entries)
+            return self.process_entries(raw_entries, now, profile)
+
+        def parsed(future: concurrent.futures.Future) -> Tuple[Dict, List[NewsItem]]:
+            payload = parsing.pop(future)
+            url = payload["source"]["url"]
+            return payload["source"], accepted(self._collect_parse(future, [payload], horizon).get(url, []))
+
+        for source, result in self.iter_fetch():
+            if source["url"] not in profile.source_urls:
+                continue  # Polled for another region
+            if result is None:
+                yield source, accepted([])
+            elif isinstance(result, list):
+                yield source, accepted(result)
+            elif "entries" in result:
+                yield source, accepted(result["entries"])
+            else:
+                parsing[self._submit_parse([result], horizon)] = result
+            for future in [f for f in parsing if f.done()]:
+                yield parsed(future)
+        for future in concurrent.futures.as_completed(list(parsing)):
+            yield parsed(future)
+
+    def fetch_entries(self) -> Dict[str, List[Entry]]:
+        """One poll of every source (shared by all regions): raw entries by source URL, in completion order."""
+        entries_by_url = {}
+        horizon = datetime.now(timezone.utc) - timedelta(days=FRESHNESS_DAYS)
+        # Downloaded bodies go to the parse pool while the rest still download, batched
+        # up to PARSE_CHUNK_BYTES; a bigger body is a task of its own
+        parsing: Dict[concurrent.futures.Future, List[Dict]] = {}
+        batch, batch_bytes = [], 0
+        for source, result in self.iter_fetch():
+            if result is None:
+                continue
+            if isinstance(result, list):
+                entries_by_url[source["url"]] = result
+            elif "entries" in result:
+                entries_by_url[source["url"]] = result["entries"]
+            else:
+                batch.append(result)
+                batch_bytes += len(result["body"])
+                if batch_bytes >= PARSE_CHUNK_BYTES:
+                    parsing[self._submit_parse(batch, horizon)] = batch
+                    batch, batch_bytes = [], 0
+        if batch:
+            parsing[self._submit_parse(batch, horizon)] = batch
+        for future in concurrent.futures.as_completed(parsing):
+            entries_by_url.update(self._collect_parse(future, parsing[future], horizon))
+        return entries_by_url
+
+    def _region_entries(self, entries_by_url: Dict[str, List[Entry]], profile: RegionProfile) -> List[Entry]:
+        return [entry for url, entries in entries_by_url.items() if url in profile.source_urls for entry in entries]
+
+    def fetch_news(self) -> List[NewsItem]:
+        """Fetch, filter, and score news for the default region. Sorted by importance."""
+        return self.process_entries(self._region_entries(self.fetch_entries(), self.profile))
+
+    def fetch_regions(self) -> Dict[str, List[NewsItem]]:
+        """
+        One shared poll, then each region's filter and scoring over its own sources.
+        An article several regions receive is summarized once (the summary cache is shared).
+        """
+        entries_by_url = self.fetch_entries()
         now = datetime.now(timezone.utc)
-        seven_days_ago = now - timedelta(days=7)
+        return {
+            region_id: self.process_entries(self._region_entries(entries_by_url, profile), now, profile)
+            for region_id, profile in self.regions.items()
+        }
+
+    def process_entries(self, all_raw_entries: List[Entry], now: Optional[datetime] = None,
+                        profile: Optional[RegionProfile] = None) -> List[NewsItem]:
+        """
+        Filter, classify and score raw entries for one region (default: the first profile).
+        Sorted by importance. `now` pins the freshness window (used when replaying recorded payloads).
+        Features are collected per item and the survivors are scored and ranked in one batch.
+        """
+        profile = profile or self.profile
+        candidates = []
+        title_hits, mentions, categories, ages_hours, timestamps = [], [], [], [], []
+        seen_links = set()
+        
+        if now is None:
+            now = datetime.now(timezone.utc)
+        seven_days_ago = now - timedelta(days=FRESHNESS_DAYS)
         
         for entry in all_raw_entries:
-            link = entry.get("link", "")
+            link = entry.link
             if not link or link in seen_links: continue
             seen_links.add(link)
             
             # --- TIME FILTERING ---
-            pub_date_str = entry.get("published", "")
+            pub_date_str = entry.published
             
             # DEFAULT: If no date found in HTML source, treat as EXPIRED (very old)
             # to prevent leaks. RSS usually has dates or is live anyway.
             # We use 1970 as a safe 'old' date.
             pub_date_obj = datetime(1970, 1, 1, tzinfo=timezone.utc)
-            is_fresh = True
             
             if pub_date_str:
                 try:
@@ -298,20 +773,17 @@ class RSSParser:
             
             # Final 7-day check
             if pub_date_obj < seven_days_ago:
-                is_fresh = False
-                
-            if not is_fresh:
                 continue
 
-            title = entry.get("title", "")
-            summary = self.clean_text(entry.get("summary", ""))
-            if not summary: summary = title
+            title = entry.title
+            summary = entry.summary or title # Already cleaned by the parse stage
             
             # --- NEGATIVE FILTERING ---
             # Exclude news about other major cities if they don't explicitly mention Ulytau.
-            full_text_lower = f"{title} {summary}".lower()
-            has_exclude = any(k in full_text_lower for k in self.exclude_keywords)
-            has_include = self.is_relevant(f"{title} {summary}")
+            full_text = f"{title} {summary}"
+            full_text_lower = full_text.lower()
+            has_exclude = any(k in full_text_lower for k in profile.exclude_keywords)
+            has_include = any(k in full_text_lower for k in profile.region_keywords)
             
             if has_exclude and not has_include:
                  # It mentions another city (e.g. Shymkent) AND NOT Ulytau -> SKIP
@@ -319,37 +791,221 @@ class RSSParser:
                  continue
 
             # --- CATEGORY DETECTION ---
-            ctype = self.law_detector.get_category(f"{title} {summary}")
+            ctype = self.law_detector.get_category(full_text)
             
             # --- BYPASS FILTER FOR CONSTITUTION ONLY ---
             # User requested strict filtering. General laws are now hidden unless they mention Ulytau.
             # Only Constitutional changes (major events) bypass the region check.
-            if ctype != "constitution" and not self.is_relevant(f"{title} {summary}"):
+            if ctype != "constitution" and not has_include:
                 continue
             
-            score = self.calculate_importance(title, summary, ctype, pub_date_str)
-            
-            processed_news.append({
-                "title": title,
-                "summary": summary[:350] + "..." if len(summary) > 350 else summary,
-                "type": ctype,
-                "source": entry.get("source_name"),
-                "link": link,
-                "score": score,
-                "pub_date_obj": pub_date_obj # Store for sorting
-            })
-
-        # --- MULTI-LEVEL SORTING ---
+            # --- SCORING FEATURES ---
+            title_lower = title.lower()
+            title_hits.append(any(k in title_lower for k in profile.region_keywords))
+            mentions.append(sum(full_text_lower.count(k) for k in profile.region_keywords))
+            categories.append(CATEGORY_CODES.get(ctype, 0))
+            timestamps.append(pub_date_obj.timestamp())
+            ages_hours.append((now - pub_date_obj).total_seconds() / 3600)
+
+            # Score is set below, summary condensed below (both in one batch)
+            candidates.append(NewsItem(
+                title, summary, ctype, entry.source, link, 0,
+                self.detect_localities(full_text_lower, profile), pub_date_obj
+            ))
+
+        # --- SCORING AND MULTI-LEVEL SORTING ---
         # 1. By Score (Highest first)
         # 2. By Date (Newest first)
-        processed_news.sort(key=lambda x: (x["score"], x["pub_date_obj"]), reverse=True)
+        scores = self.scorer.score(title_hits, mentions, categories, ages_hours)
+        for item, score in zip(candidates, scores):
+            item.score = score
+        processed_news = [candidates[i] for i in self.scorer.rank(scores, timestamps)]
         
-        # Clean up objects before returning to API (JSON can't handle datetime)
-        for item in processed_news:
-            if "pub_date_obj" in item:
-                del item["pub_date_obj"]
+        # --- SUMMARIZATION ---
+        # Extractive summaries for the whole poll at once (cached by content hash)
+        summaries = self.summarizer.summarize_batch([item.summary for item in processed_news])
+        for item, summary in zip(processed_news, summaries):
+            item.summary = summary
 
         return processed_news
 
     def get_sources_status(self) -> List[Dict]:
         return list(self.source_statuses.values())
+
+    # --- Warm start ---
+
+    def export_state(self) -> Dict:
+        """Per-source fetch state (breakers, validators + entries, last statuses) for persisting."""
+        return {
+            "breakers": {url: breaker.to_dict() for url, breaker in self.breakers.items()},
+            "validators": {
+                url: dict(v, entries=[e.to_list() for e in v["entries"]]) for url, v in self.validators.items()
+            },
+            "source_statuses": self.source_statuses,
+            "telegram": self.telegram_state,
+            "host_backoff": self.host_limiter.export_state()
+        }
+
+    def load_state(self, state: Dict):
+        """Restore state saved by export_state(); sources no longer configured are ignored."""
+        for url, data in state.get("breakers", {}).items():
+            if url in self.breakers:
+                self.breakers[url].restore(data)
+        self.validators.update({
+            url: dict(v, entries=[Entry.from_json(e) for e in v.get("entries", [])])
+            for url, v in state.get("validators", {}).items() if url in self.breakers
+        })
+        self.source_statuses.update({url: s for url, s in state.get("source_statuses", {}).items() if url in self.breakers})
+        self.telegram_state.update({url: t for url, t in state.get("telegram", {}).items() if url in self.breakers})
+        self.host_limiter.load_state(state.get("host_backoff", {}))
+        logger.info(f"Warm start: Restored fetch state for {len(self.validators)} cached sources")
+
+
+# --- Batch CLI: python -m app.rss_parser --once ---
+
+EXPORT_FIELDS = ["published", "score", "type", "source", "title", "link", "localities", "summary"]
+# Exit codes: every source answered / some failed, were late or rate limited / none answered
+EXIT_OK, EXIT_PARTIAL, EXIT_FAILED = 0, 1, 2
+
+
+def _existing_links(path: str, fmt: str) -> set:
+    """Links already in an export file (for --append)."""
+    links = set()
+    try:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            if fmt == "csv":
+                links.update(row.get("link") for row in csv.DictReader(f))
+            else:
+                for line in f:
+                    try:
+                        links.add(json.loads(line).get("link"))
+                    except ValueError:
+                        continue
+    except FileNotFoundError:
+        pass
+    links.discard(None)
+    links.discard("")
+    return links
+
+
+def _load_cli_state(parser: RSSParser, state_path: Optional[str]) -> Optional[str]:
+    """
+    Warm start from --state, else (read only) from the service's snapshot, so the
+    batch run sends the same validators and respects the same open breakers.
+    """
+    if state_path and os.path.exists(state_path):
+        with open(state_path, "r", encoding="utf-8") as f:
+            parser.load_state(json.load(f))
+        return state_path
+    from app.snapshot_store import SnapshotStore
+    snapshot_path = os.getenv("SNAPSHOT_PATH", "news_snapshot.bin")
+    snapshot = SnapshotStore(snapshot_path).read()
+    if snapshot is not None and snapshot.has_section("_fetch_state"):
+        parser.load_state(snapshot.json("_fetch_state"))
+        return snapshot_path
+    return None
+
+
+def _save_cli_state(parser: RSSParser, state_path: str):
+    directory = os.path.dirname(os.path.abspath(state_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".fetch-state-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(parser.export_state(), f, ensure_ascii=False)
+        os.replace(tmp_path, state_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _status_label(status: Dict) -> str:
+    if status.get("late"):
+        return "late"
+    if status.get("rate_limited"):
+        return "rate_limited"
+    if status.get("ok"):
+        return "not_modified" if status.get("not_modified") else "ok"
+    return "error"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m app.rss_parser",
+                                 description="Run the ingest pipeline once and export the accepted items")
+    ap.add_argument("--once", action="store_true", required=True, help="Run one poll and exit")
+    ap.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    ap.add_argument("--out", default="-", help="Output file ('-' for stdout)")
+    ap.add_argument("--append", action="store_true", help="Append only items whose link is not in --out yet")
+    ap.add_argument("--state", help="Fetch state file (validators, breakers) read before and written after the run; "
+                                    "without it the service's snapshot is read, if present")
+    ap.add_argument("--region", help="Region profile to export (default: the default region)")
+    ap.add_argument("--verbose", action="store_true")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, stream=sys.stderr,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.append and args.out == "-":
+        ap.error("--append needs --out PATH")
+
+    parser = RSSParser()
+    profile = parser.regions.get(args.region) if args.region else parser.profile
+    if profile is None:
+        ap.error(f"unknown region '{args.region}' (known: {', '.join(parser.regions)})")
+    state_from = _load_cli_state(parser, args.state)
+    if state_from:
+        logger.info(f"CLI: Fetch state restored from {state_from}")
+
+    seen = _existing_links(args.out, args.format) if args.append else set()
+    if args.out == "-":
+        out = sys.stdout
+    else:
+        write_header = not (args.append and os.path.exists(args.out) and os.path.getsize(args.out))
+        out = open(args.out, "a" if args.append else "w", encoding="utf-8", newline="")
+    writer = None
+    if args.format == "csv":
+        writer = csv.DictWriter(out, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+        if args.out == "-" or write_header:
+            writer.writeheader()
+
+    # Items are written as each source completes
+    statuses = []
+    written = 0
+    try:
+        for source, items in parser.iter_news(profile):
+            new_items = 0
+            for item in items:
+                if item.link in seen:
+                    continue
+                seen.add(item.link)
+                row = item.to_dict()
+                if writer:
+                    writer.writerow(dict(row, localities=";".join(row["localities"])))
+                else:
+                    out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                new_items += 1
+            out.flush()
+            written += new_items
+            status = parser.source_statuses.get(source["url"]) or {"name": source.get("name"), "url": source["url"]}
+            statuses.append((status, len(items), new_items))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if args.state:
+        _save_cli_state(parser, args.state)
+
+    for status, accepted, new_items in statuses:
+        label = _status_label(status)
+        error = f"  {status['error']}" if status.get("error") and label != "ok" else ""
+        print(f"{label:<13} {accepted:>4} accepted {new_items:>4} new {status.get('elapsed_ms', 0):>6} ms  "
+              f"{status.get('name')}{error}", file=sys.stderr)
+    labels = [_status_label(status) for status, _, _ in statuses]
+    answered = sum(1 for label in labels if label in ("ok", "not_modified"))
+    print(f"{written} items written, {answered}/{len(labels)} sources answered", file=sys.stderr)
+    if not answered:
+        return EXIT_FAILED
+    return EXIT_OK if answered == len(labels) else EXIT_PARTIAL
+
+
+if __name__ == "__main__":
+    sys.exit(main())
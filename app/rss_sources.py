@@ -1,4 +1,6 @@
 # app/rss_sources.py
+import json
+import os
 
 # Strict Keywords for Filtering
 # News MUST contain at least one of these to be shown.
@@ -14,6 +16,26 @@ REGION_KEYWORDS = [
     "Ұлытау облысы", "Улытауская область", "Ulytau Region"
 ]
 
+# Localities subscribers can filter on (id -> display label / keywords).
+# Items are tagged with every locality they mention (see RSSParser.detect_localities).
+LOCALITY_LABELS = {
+    "zhezkazgan": "Жезқазған",
+    "satpayev": "Сәтпаев",
+    "karazhal": "Қаражал",
+    "zhanaarka": "Жаңаарқа",
+    "ulytau_district": "Ұлытау ауданы",
+}
+LOCALITY_KEYWORDS = {
+    "zhezkazgan": ["Жезқазған", "Жезказган", "Zhezkazgan", "Jezkazgan"],
+    "satpayev": ["Сатпаев", "Сәтпаев", "Satpayev", "Satpaev"],
+    "karazhal": ["Қаражал", "Каражал", "Karazhal"],
+    "zhanaarka": ["Жаңаарқа", "Жанаарка", "Zhanaarka"],
+    "ulytau_district": [
+        "Ұлытау аудан", "Улытауский район", "Улытауского района", "Улытауском районе",
+        "Ulytau district"
+    ],
+}
+
 # Law/Category Keywords
 LAW_KEYWORDS = [
     "закон", "указ", "постановление", "бұйрық", "қаулы", "кодекс", 
@@ -185,3 +207,10 @@ SOURCES = [
         "type": "telegram"
     }
 ]
+
+# Optional override: load the source list from a JSON file instead
+# (e.g. the list written by mock_upstream.py for load testing).
+SOURCES_FILE = os.getenv("SOURCES_FILE")
+if SOURCES_FILE:
+    with open(SOURCES_FILE, "r", encoding="utf-8") as f:
+        SOURCES = json.load(f)
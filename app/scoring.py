@@ -0,0 +1,98 @@
+# app/scoring.py
+import logging
+import os
+from typing import Dict, List, Optional, Sequence
+
+from app._numpy import load_numpy
+
+logger = logging.getLogger(__name__)
+
+MAX_SCORE = 5
+# Points per feature. Override with e.g. SCORE_WEIGHTS="title=3,fresh=2"
+DEFAULT_WEIGHTS = {
+    "base": 1,      # Every accepted item
+    "title": 2,     # Region keyword in the title
+    "law": 2,       # Law/act (laws are high priority)
+    "mentions": 1,  # More than MENTIONS_THRESHOLD region keyword mentions
+    "fresh": 1      # Published less than FRESH_HOURS ago
+}
+MENTIONS_THRESHOLD = int(os.getenv("SCORE_MENTIONS_THRESHOLD", "3"))
+FRESH_HOURS = float(os.getenv("SCORE_FRESH_HOURS", "24"))
+
+CATEGORY_NEWS = 0
+CATEGORY_LAW = 1
+CATEGORY_CONSTITUTION = 2
+CATEGORY_CODES = {"news": CATEGORY_NEWS, "law": CATEGORY_LAW, "constitution": CATEGORY_CONSTITUTION}
+
+# numpy is imported on the first batch; without it scoring runs per item
+NUMPY_FALLBACK = "Scoring: numpy not installed, scoring items one by one."
+
+
+def parse_weights(spec: Optional[str]) -> Dict[str, float]:
+    """DEFAULT_WEIGHTS updated from a "name=value,..." string; unknown names are ignored."""
+    weights = dict(DEFAULT_WEIGHTS)
+    for part in (spec or "").split(","):
+        name, _, value = part.partition("=")
+        name = name.strip()
+        if not name:
+            continue
+        try:
+            if name not in weights:
+                raise ValueError("unknown weight")
+            weights[name] = float(value)
+        except ValueError:
+            logger.warning(f"Scoring: Ignoring SCORE_WEIGHTS entry '{part.strip()}'")
+    return weights
+
+
+class ImportanceScorer:
+    """
+    Scores (1 to 5) and ranks one poll's candidates in a batch.
+
+    Features are gathered per item while filtering: region keyword in the title,
+    keyword mention count, category and age in hours (against one `now` per poll).
+    Constitutional items always get the maximum score.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None,
+                 mentions_threshold: int = MENTIONS_THRESHOLD, fresh_hours: float = FRESH_HOURS):
+        self.weights = weights if weights is not None else parse_weights(os.getenv("SCORE_WEIGHTS"))
+        self.mentions_threshold = mentions_threshold
+        self.fresh_hours = fresh_hours
+
+    def score(self, title_hits: Sequence[bool], mentions: Sequence[int], categories: Sequence[int],
+              ages_hours: Sequence[float]) -> List[int]:
+        if not title_hits:
+            return []
+        np = load_numpy(NUMPY_FALLBACK)
+        if np is None:
+            return [self._score_one(*features) for features in zip(title_hits, mentions, categories, ages_hours)]
+
+        w = self.weights
+        categories = np.asarray(categories, dtype=np.int8)
+        scores = (w["base"]
+                  + w["title"] * np.asarray(title_hits, dtype=bool)
+                  + w["law"] * (categories == CATEGORY_LAW)
+                  + w["mentions"] * (np.asarray(mentions) > self.mentions_threshold)
+                  + w["fresh"] * (np.asarray(ages_hours, dtype=np.float64) < self.fresh_hours))
+        scores = np.clip(np.floor(scores), 1, MAX_SCORE).astype(np.int64)
+        scores[categories == CATEGORY_CONSTITUTION] = MAX_SCORE
+        return scores.tolist()
+
+    def _score_one(self, title_hit: bool, mentions: int, category: int, age_hours: float) -> int:
+        if category == CATEGORY_CONSTITUTION:
+            return MAX_SCORE
+        w = self.weights
+        score = (w["base"] + w["title"] * bool(title_hit) + w["law"] * (category == CATEGORY_LAW)
+                 + w["mentions"] * (mentions > self.mentions_threshold) + w["fresh"] * (age_hours < self.fresh_hours))
+        return int(min(max(score // 1, 1), MAX_SCORE))
+
+    @staticmethod
+    def rank(scores: Sequence[int], published: Sequence[float]) -> List[int]:
+        """Indices by score, then publication timestamp, highest first; ties keep input order."""
+        np = load_numpy(NUMPY_FALLBACK)
+        if np is None:
+            return sorted(range(len(scores)), key=lambda i: (scores[i], published[i]), reverse=True)
+        # lexsort is stable: the last key is the primary one
+        return np.lexsort((-np.asarray(published, dtype=np.float64),
+                           -np.asarray(scores, dtype=np.int64))).tolist()
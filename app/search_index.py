@@ -0,0 +1,203 @@
+# app/search_index.py
+import heapq
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from app.news_item import NewsItem
+from app.text_utils import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Articles are searchable for this long after they were first ingested
+SEARCH_RETENTION_DAYS = int(os.getenv("SEARCH_RETENTION_DAYS", "90"))
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Title terms count this many times (headlines are the best signal for short queries)
+TITLE_WEIGHT = 2
+EVICT_EVERY_SEC = 3600
+MAX_PAGE_SIZE = 50
+
+
+class SearchIndex:
+    """
+    Inverted index over accepted news items.
+
+    Documents live in an append-only JSON Lines log written by the refreshing worker
+    (`append`). Every worker tails the log (`sync`) and adds only the new lines to its
+    in-memory postings, so queries never rescan stored articles. Documents are keyed
+    by link: an article is indexed once, when it is first accepted.
+    """
+
+    def __init__(self, path: str, retention_days: int = SEARCH_RETENTION_DAYS):
+        self.path = path
+        self.retention_sec = retention_days * 86400
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.docs: Dict[int, Dict] = {}
+        self.postings: Dict[str, Dict[int, int]] = {}  # term -> {doc id: term frequency}
+        self.doc_terms: Dict[int, List[str]] = {}
+        self.doc_len: Dict[int, int] = {}
+        self.by_key: Dict[str, int] = {}
+        self.total_len = 0
+        self._next_id = 0
+        self._offset = 0
+        self._file_id = None
+        self._log_lines = 0
+        self._last_evict = 0.0
+
+    # --- Log ---
+
+    @staticmethod
+    def _key(item: Dict) -> str:
+        return item.get("link") or item.get("title", "")
+
+    def append(self, items: List[NewsItem], now: Optional[float] = None) -> int:
+        """Log items not indexed yet (refresher only). Returns how many were added."""
+        now = now or time.time()
+        with self._lock:
+            self._sync_locked(now)
+            lines = []
+            seen = set()
+            for item in items:
+                key = item.link or item.title
+                if not key or key in self.by_key or key in seen:
+                    continue
+                seen.add(key)
+                doc = item.to_dict()
+                doc["indexed_at"] = now
+                lines.append(json.dumps(doc, ensure_ascii=False))
+            if lines:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+            self._sync_locked(now)
+            # Expired documents stay in the log until it is rewritten
+            if self._log_lines > 2 * max(len(self.docs), 1000):
+                self._compact_locked(now)
+            return len(lines)
+
+    def _compact_locked(self, now: float):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".search-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for doc_id in sorted(self.docs):
+                    f.write(json.dumps(self.docs[doc_id], ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Search: Compaction failed: {e}")
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+        logger.info(f"Search: Compacted log from {self._log_lines} to {len(self.docs)} documents")
+        self._reset()
+        self._sync_locked(now)
+
+    def sync(self, now: Optional[float] = None):
+        """Index lines appended to the log since the last call (cheap when nothing changed)."""
+        with self._lock:
+            self._sync_locked(now or time.time())
+
+    def _sync_locked(self, now: float):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        # A compacted (replaced) or truncated log is re-read from the start
+        if self._file_id != (st.st_dev, st.st_ino) or st.st_size < self._offset:
+            if self._file_id is not None:
+                self._reset()
+            self._file_id = (st.st_dev, st.st_ino)
+        if st.st_size > self._offset:
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read(st.st_size - self._offset)
+            # Only consume complete lines; a line being written is picked up next time
+            end = data.rfind(b"\n") + 1
+            for line in data[:end].splitlines():
+                self._log_lines += 1
+                try:
+                    doc = json.loads(line)
+                except ValueError:
+                    continue
+                if now - doc.get("indexed_at", now) < self.retention_sec:
+                    self._add(doc)
+            self._offset += end
+        if now - self._last_evict >= EVICT_EVERY_SEC:
+            self._evict(now - self.retention_sec)
+            self._last_evict = now
+
+    # --- Postings ---
+
+    def _add(self, doc: Dict):
+        key = self._key(doc)
+        if key in self.by_key:
+            return
+        doc_id = self._next_id
+        self._next_id += 1
+        counts = Counter(tokenize(doc.get("title", "")) * TITLE_WEIGHT)
+        counts.update(tokenize(doc.get("summary", "")))
+        for term, tf in counts.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+        length = sum(counts.values())
+        self.docs[doc_id] = doc
+        self.doc_terms[doc_id] = list(counts)
+        self.doc_len[doc_id] = length
+        self.by_key[key] = doc_id
+        self.total_len += length
+
+    def _evict(self, cutoff: float):
+        expired = [doc_id for doc_id, doc in self.docs.items() if doc.get("indexed_at", 0) < cutoff]
+        for doc_id in expired:
+            for term in self.doc_terms.pop(doc_id):
+                posting = self.postings.get(term)
+                if posting is not None:
+                    posting.pop(doc_id, None)
+                    if not posting:
+                        del self.postings[term]
+            self.total_len -= self.doc_len.pop(doc_id)
+            self.by_key.pop(self._key(self.docs.pop(doc_id)), None)
+        if expired:
+            logger.info(f"Search: Evicted {len(expired)} documents older than the retention window")
+
+    # --- Query ---
+
+    def search(self, query: str, page: int = 1, page_size: int = 10) -> Dict:
+        """BM25-ranked documents matching any query term; best matches (all terms) first."""
+        page = max(page, 1)
+        page_size = min(max(page_size, 1), MAX_PAGE_SIZE)
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            self._sync_locked(time.time())
+            n_docs = len(self.docs)
+            scores: Dict[int, float] = {}
+            if terms and n_docs:
+                avg_len = self.total_len / n_docs
+                for term in terms:
+                    posting = self.postings.get(term)
+                    if not posting:
+                        continue
+                    idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                    for doc_id, tf in posting.items():
+                        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[doc_id] / avg_len)
+                        scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+            # Ties (e.g. single-term queries over similar headlines) go to the newer document
+            top = heapq.nlargest(page * page_size, scores.items(), key=lambda kv: (kv[1], kv[0]))
+            data = [dict(self.docs[doc_id], rank=round(score, 4)) for doc_id, score in top[(page - 1) * page_size:]]
+        return {
+            "query": query,
+            "terms": terms,
+            "total": len(scores),
+            "page": page,
+            "page_size": page_size,
+            "data": data
+        }
@@ -0,0 +1,250 @@
+# app/snapshot_store.py
+import gzip
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: no flock, every process refreshes on its own
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# File layout: MAGIC | meta length (uint32) | meta JSON | section bytes...
+MAGIC = b"ULYS"
+PREFIX = struct.Struct("<4sI")
+# Sections at least this large also get a pre-compressed "<name>.gz" copy
+GZIP_MIN_BYTES = 1024
+# Sections named "_<name>" are internal state: stored as-is, never served
+INTERNAL_PREFIX = "_"
+
+
+def content_etag(data: bytes) -> str:
+    """Strong ETag derived from the content, stable across versions with identical bodies."""
+    return '"' + hashlib.sha1(data).hexdigest()[:20] + '"'
+
+
+def gzip_etag(etag: str) -> str:
+    """ETag of the gzip copy: a different representation needs a different strong ETag."""
+    return etag[:-1] + '-gz"'
+
+
+class Snapshot:
+    """One immutable snapshot version, backed by a read-only mmap of the snapshot file."""
+
+    def __init__(self, mm: mmap.mmap, meta: Dict, data_offset: int):
+        self._mm = mm
+        self.meta = meta
+        self._data_offset = data_offset
+        self._cache = {}
+
+    @property
+    def version(self) -> int:
+        return self.meta.get("version", 0)
+
+    @property
+    def created_at(self) -> float:
+        return self.meta.get("created_at", 0.0)
+
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+    def has_section(self, name: str) -> bool:
+        return name in self.meta.get("sections", {})
+
+    def etag(self, name: str) -> Optional[str]:
+        return self.meta.get("etags", {}).get(name)
+
+    def section(self, name: str) -> bytes:
+        """Raw bytes of a section (copied out of the mmap once per version)."""
+        if name not in self._cache:
+            offset, length = self.meta["sections"][name]
+            start = self._data_offset + offset
+            self._cache[name] = self._mm[start:start + length]
+        return self._cache[name]
+
+    def json(self, name: str):
+        """Decoded JSON section (decoded once per version)."""
+        key = "json:" + name
+        if key not in self._cache:
+            self._cache[key] = json.loads(self.section(name))
+        return self._cache[key]
+
+
+class SnapshotStore:
+    """
+    Snapshot file shared by all uvicorn workers.
+    The writer builds a new file next to the old one and swaps it in with os.replace,
+    so readers always see a complete version; each write bumps the version counter.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._key = None
+        self._current: Optional[Snapshot] = None
+
+    def read(self) -> Optional[Snapshot]:
+        """Return the latest snapshot, re-mapping the file only when it was swapped."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            if key == self._key:
+                return self._current
+            try:
+                with open(self.path, "rb") as f:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                magic, meta_len = PREFIX.unpack_from(mm, 0)
+                if magic != MAGIC:
+                    raise ValueError("bad magic")
+                meta = json.loads(mm[PREFIX.size:PREFIX.size + meta_len])
+                self._current = Snapshot(mm, meta, PREFIX.size + meta_len)
+                self._key = key
+            except Exception as e:
+                logger.error(f"Snapshot: Failed to read {self.path}: {e}")
+                return self._current
+            return self._current
+
+    def write(self, sections: Dict[str, bytes], extra_meta: Optional[Dict] = None) -> int:
+        """
+        Atomically publish a new snapshot version. Returns the new version number.
+        Each served section gets a content ETag, and larger ones a gzip copy with its own
+        ETag, computed once here so readers never re-serialize or re-compress.
+        """
+        current = self.read()
+        version = (current.version if current else 0) + 1
+
+        served = [name for name in sections if not name.startswith(INTERNAL_PREFIX)]
+        etags = {name: content_etag(sections[name]) for name in served}
+        sections = dict(sections)
+        for name in served:
+            if len(sections[name]) >= GZIP_MIN_BYTES:
+                sections[name + ".gz"] = gzip.compress(sections[name], compresslevel=6, mtime=0)
+                etags[name + ".gz"] = gzip_etag(etags[name])
+
+        layout = {}
+        offset = 0
+        for name, data in sections.items():
+            layout[name] = [offset, len(data)]
+            offset += len(data)
+        meta = dict(extra_meta or {})
+        meta.update({"version": version, "created_at": time.time(), "sections": layout, "etags": etags})
+        meta_bytes = json.dumps(meta).encode("utf-8")
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(PREFIX.pack(MAGIC, len(meta_bytes)))
+                f.write(meta_bytes)
+                for data in sections.values():
+                    f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        logger.info(f"Snapshot: Published version {version} ({offset} bytes)")
+        return version
+
+
+class SnapshotRefresher:
+    """
+    Background refresher. Only the worker holding the lock file runs `build_sections`
+    and publishes snapshots; the others just read. If the refresher process dies its
+    lock is released and another worker takes over on its next attempt.
+    """
+
+    def __init__(self, store: SnapshotStore, build_sections: Callable[[], Dict[str, bytes]], interval_sec: int = 300):
+        self.store = store
+        self.build_sections = build_sections
+        self.interval_sec = interval_sec
+        self.lock_path = store.path + ".lock"
+        self.is_leader = False
+        self._lock_file = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def try_lead(self) -> bool:
+        """Try to become the designated refresher (non-blocking)."""
+        if self.is_leader:
+            return True
+        if fcntl is None:
+            self.is_leader = True
+            return True
+        f = open(self.lock_path, "a")
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._lock_file = f  # Held for the lifetime of the process
+        self.is_leader = True
+        logger.info(f"Snapshot: Process {os.getpid()} is now the refresher")
+        return True
+
+    def refresh_now(self) -> Optional[int]:
+        """Build and publish a snapshot (leader only). Concurrent callers wait for the running refresh."""
+        if not self.try_lead():
+            return None
+        with self._refresh_lock:
+            try:
+                return self.store.write(self.build_sections())
+            except Exception as e:
+                logger.error(f"Snapshot: Refresh failed: {e}")
+                return None
+
+    def _due(self) -> bool:
+        snapshot = self.store.read()
+        return snapshot is None or snapshot.age() >= self.interval_sec
+
+    def _loop(self):
+        while not self._stop.is_set():
+            if self.try_lead() and self._due():
+                self.refresh_now()
+            # Leaders wake up to refresh, followers to retry the lock
+            self._stop.wait(min(self.interval_sec, 30))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="snapshot-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def wait_for_snapshot(self, timeout: float) -> Optional[Snapshot]:
+        """Return the current snapshot, refreshing inline (leader) or waiting (follower) if none exists yet."""
+        snapshot = self.store.read()
+        if snapshot is not None:
+            return snapshot
+        if self.try_lead():
+            with self._refresh_lock:
+                # Another request may have published while we waited for the lock
+                if self.store.read() is None:
+                    try:
+                        self.store.write(self.build_sections())
+                    except Exception as e:
+                        logger.error(f"Snapshot: First refresh failed: {e}")
+                        return None
+            return self.store.read()
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            time.sleep(0.5)
+            snapshot = self.store.read()
+            if snapshot is not None:
+                return snapshot
+        return None
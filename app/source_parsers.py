@@ -0,0 +1,232 @@
+# app/source_parsers.py
+"""
+CPU-bound parsing of downloaded source payloads.
+
+Everything here is module-level and works on plain bytes/tuples so it can run
+either inline or inside a process pool worker (see RSSParser.fetch_news).
+Entries are returned as compact tuples in ENTRY_FIELDS order; summaries are
+already cleaned of HTML.
+"""
+import os
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.feed_stream import parse_feed_stream, read_feed_stream
+
+# (title, link, summary, published)
+ENTRY_FIELDS = ("title", "link", "summary", "published")
+EntryTuple = Tuple[str, str, str, str]
+
+# Hard cap on bytes read per source per poll, protects memory if a feed balloons
+MAX_SOURCE_BYTES = int(os.getenv("MAX_SOURCE_BYTES", str(2 * 1024 * 1024)))
+
+# Consecutive stale entries after which a date-sorted feed is abandoned
+STALE_STREAK = 5
+
+IMG_URL_RE = re.compile(r'https?://\S+\.(?:jpg|jpeg|png|webp|gif)\S*', re.IGNORECASE)
+IMG_HOST_RE = re.compile(r'https?://img\S+', re.IGNORECASE)
+DATE_CLASS_RE = re.compile(r"date|time|bi_date_pub", re.I)
+DATE_TEXT_RE = re.compile(r'(\d{2}\.\d{2}\.\d{4})')
+# Telegram Web wraps messages in tgme_widget_message_wrap; data-post="<channel>/<id>"
+TG_WRAP_RE = re.compile(rb'<div class="tgme_widget_message_wrap')
+TG_POST_ID_RE = re.compile(rb'data-post="[^"/]*/(\d+)"')
+
+
+def _soup(content):
+    # bs4 is imported on first use: startup and markup-free feeds never pay for it
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(content, "html.parser")
+
+# A soup is a reference cycle (parent <-> children): callers decompose() it once the
+# strings they need are extracted, so it is freed right away instead of at the next GC.
+
+
+def clean_text(text: str) -> str:
+    """Clean HTML and remove unwanted urls/spaces."""
+    if not text: return ""
+    # Plain text (no tags, no entities) does not need an HTML parser
+    if "<" in text or "&" in text:
+        soup = _soup(text)
+        text = soup.get_text(separator=" ", strip=True)
+        soup.decompose()
+    text = IMG_URL_RE.sub('', text)
+    text = IMG_HOST_RE.sub('', text)
+    text = ' '.join(text.split())
+    return text
+
+
+def _stale_streak(source: Dict) -> Optional[int]:
+    # Google News search feeds are ordered by relevance, not date,
+    # so a run of stale entries says nothing about what follows.
+    return STALE_STREAK if source.get("type", "rss") == "rss" else None
+
+
+def parse_feed(source: Dict, chunks, horizon: Optional[datetime] = None, max_bytes: Optional[int] = None) -> Tuple[List[EntryTuple], Dict]:
+    """Stream-parse an RSS/Atom feed, skipping entries older than `horizon`."""
+    entries, stats = parse_feed_stream(chunks, horizon=horizon, max_bytes=max_bytes, stale_streak=_stale_streak(source))
+    return [(e["title"], e["link"], clean_text(e["summary"]), e["published"]) for e in entries], stats
+
+
+def read_feed(source: Dict, chunks, horizon: Optional[datetime] = None, max_bytes: Optional[int] = None) -> Tuple[bytes, Dict]:
+    """Download side of parse_feed (parse pool): the body up to where parse_feed would stop reading."""
+    return read_feed_stream(chunks, horizon=horizon, max_bytes=max_bytes, stale_streak=_stale_streak(source))
+
+
+def parse_html_list(content: bytes, source_url: str) -> List[EntryTuple]:
+    """Extract headline links (and nearby dates) from a news listing page."""
+    soup = _soup(content)
+    try:
+        return _html_list_entries(soup, source_url)
+    finally:
+        soup.decompose()
+
+
+def _html_list_entries(soup, source_url: str) -> List[EntryTuple]:
+    entries = []
+    links = soup.find_all('a', href=True)
+    valid_count = 0
+    for a in links:
+        if valid_count >= 10: break # More candidates, but filter strictly
+        t = clean_text(a.get_text())
+        if len(t) < 25: continue
+        link = a['href']
+        if "gov.kz" in source_url and "/press/news/" not in link: continue
+        if link.startswith("/"):
+            link = ("https://www.gov.kz" if "gov.kz" in source_url else "https://news20.kz") + link
+
+        # --- IMPROVED HTML Date Extraction ---
+        pub_date = ""
+        # Search up to 4 parents for metadata container
+        parent = a
+        for _ in range(4):
+            parent = parent.parent
+            if not parent: break
+
+            # 1. Look for <time> tag
+            time_tag = parent.find("time")
+            if time_tag:
+                pub_date = time_tag.get("datetime") or time_tag.get_text()
+                break
+
+            # 2. Look for common date classes
+            date_el = parent.find(class_=DATE_CLASS_RE)
+            if date_el:
+                pub_date = date_el.get_text()
+                break
+
+            # 3. Fallback: Regex in parent text
+            date_match = DATE_TEXT_RE.search(parent.get_text())
+            if date_match:
+                pub_date = date_match.group(1)
+                break
+
+        entries.append((t, link, t, pub_date))
+        valid_count += 1
+    return entries
+
+
+def split_telegram_posts(content: bytes) -> List[Tuple[int, bytes]]:
+    """Cut a channel page into (post id, block html) without parsing it. Page order: oldest first."""
+    starts = [m.start() for m in TG_WRAP_RE.finditer(content)]
+    blocks = []
+    for i, start in enumerate(starts):
+        block = content[start:starts[i + 1] if i + 1 < len(starts) else len(content)]
+        match = TG_POST_ID_RE.search(block)
+        blocks.append((int(match.group(1)) if match else 0, block))
+    return blocks
+
+
+def parse_telegram_post(block: bytes) -> Optional[EntryTuple]:
+    """Extract one text post from its tgme_widget_message_wrap block."""
+    soup = _soup(block)
+    try:
+        return _telegram_entry(soup)
+    finally:
+        soup.decompose()
+
+
+def _telegram_entry(soup) -> Optional[EntryTuple]:
+    msg_div = soup.find("div", class_="tgme_widget_message")
+    if not msg_div: return None
+
+    # Text content
+    text_div = msg_div.find("div", class_="tgme_widget_message_text")
+    if not text_div:
+        # Maybe it is a photo-only post or album without caption?
+        # For now, skip empty text posts as they lack context for filtering
+        return None
+
+    raw_text = text_div.get_text(separator=" ", strip=True)
+    if len(raw_text) < 10: return None # Skip very short/empty messages
+
+    cleaned_text = clean_text(raw_text)
+
+    # Link
+    link_node = msg_div.find("a", class_="tgme_widget_message_date")
+    link = link_node["href"] if link_node else ""
+
+    # Date
+    time_node = msg_div.find("time", class_="time")
+    pub_date = ""
+    if time_node and time_node.has_attr("datetime"):
+        pub_date = time_node["datetime"]
+
+    title = cleaned_text[:100] + "..." if len(cleaned_text) > 100 else cleaned_text
+    return (title, link, cleaned_text, pub_date)
+
+
+def parse_telegram_page(content: bytes, after_id: int = 0, before_id: Optional[int] = None) -> Tuple[List[Tuple[int, EntryTuple]], Dict]:
+    """
+    Parse only the posts with after_id < id (< before_id) from a t.me/s/<channel> page.
+    Walks from the newest post down and stops at the first known id, so the work
+    scales with the number of new posts. Returns ([(post id, entry)], stats).
+    """
+    blocks = split_telegram_posts(content)
+    ids = [post_id for post_id, _ in blocks if post_id]
+    stats = {"posts": len(blocks), "parsed": 0, "min_id": min(ids, default=0), "max_id": max(ids, default=0)}
+    posts = []
+    for post_id, block in reversed(blocks):
+        if post_id and post_id <= after_id:
+            break
+        if before_id is not None and post_id >= before_id:
+            continue
+        stats["parsed"] += 1
+        entry = parse_telegram_post(block)
+        if entry:
+            posts.append((post_id, entry))
+    posts.reverse()
+    return posts, stats
+
+
+def parse_telegram(content: bytes) -> List[EntryTuple]:
+    """Extract text posts from a public channel page (t.me/s/<channel>)."""
+    posts, _ = parse_telegram_page(content)
+    return [entry for _, entry in posts]
+
+
+def parse_payload(source: Dict, content: bytes, horizon: Optional[datetime] = None) -> List[EntryTuple]:
+    """Dispatch a payload to the parser for its source type."""
+    source_type = source.get("type", "rss")
+    if source_type in ["rss", "google_rss"]:
+        entries, _ = parse_feed(source, [content], horizon)
+        return entries
+    if source_type == "html_list":
+        return parse_html_list(content, source.get("url", ""))
+    if source_type == "telegram":
+        return parse_telegram(content)
+    return []
+
+
+def parse_batch(jobs: List[Tuple[Dict, bytes, Optional[datetime]]]) -> List[Tuple[str, Optional[List[EntryTuple]], Optional[str]]]:
+    """
+    Process pool task: parse several payloads in one round trip.
+    Returns (source_url, entries, error) per job; a failing payload does not sink the batch.
+    """
+    results = []
+    for source, content, horizon in jobs:
+        try:
+            results.append((source.get("url"), parse_payload(source, content, horizon), None))
+        except Exception as e:
+            results.append((source.get("url"), None, str(e)))
+    return results
@@ -0,0 +1,166 @@
+# app/subscriber_index.py
+from typing import Dict, Iterable, List, Optional
+
+CATEGORIES = ("news", "law", "constitution")
+MIN_SCORE = 1
+MAX_SCORE = 5
+
+# Bit positions set in each byte value, for turning a bitmap back into slots
+_BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+
+def normalize_prefs(prefs: Optional[Dict], localities: Iterable[str]) -> Dict:
+    """
+    Clean subscriber preferences. An empty locality or category list means "all".
+    Unknown ids are dropped; min_score is clamped to 1..5.
+    """
+    prefs = prefs or {}
+    known = set(localities)
+    try:
+        min_score = int(prefs.get("min_score", MIN_SCORE))
+    except (TypeError, ValueError):
+        min_score = MIN_SCORE
+    return {
+        "localities": sorted(l for l in set(prefs.get("localities") or []) if l in known),
+        "categories": sorted(c for c in set(prefs.get("categories") or []) if c in CATEGORIES),
+        "min_score": min(max(min_score, MIN_SCORE), MAX_SCORE),
+    }
+
+
+class SubscriberIndex:
+    """
+    Bitmap index of subscriber preferences for push fan-out.
+
+    Each subscriber owns a slot (bit position). For every locality, category and
+    score there is a bitmap (a Python int) of the subscribers that accept it, so
+    the recipients of an article are a few ORs/ANDs plus one pass over the result,
+    instead of checking every subscriber's preferences.
+    """
+
+    def __init__(self, localities: Iterable[str]):
+        self.localities = list(localities)
+        self._reset()
+
+    def _reset(self):
+        self.prefs: Dict[int, Dict] = {}
+        self.slots: Dict[int, int] = {}  # chat_id -> slot
+        self.chat_ids: List[Optional[int]] = []  # slot -> chat_id
+        self.free_slots: List[int] = []
+        self.everyone = 0
+        self.any_locality = 0  # Subscribers without a locality filter
+        self.by_locality = {loc: 0 for loc in self.localities}
+        self.by_category = {cat: 0 for cat in CATEGORIES}
+        # by_score[s]: subscribers whose min_score <= s
+        self.by_score = [0] * (MAX_SCORE + 1)
+
+    def load(self, prefs_by_chat: Dict[int, Optional[Dict]]):
+        """
+        Build the index for many subscribers at once (startup). Bits are set in byte
+        arrays and converted to ints once, instead of growing every bitmap per subscriber.
+        """
+        self._reset()
+        size = (len(prefs_by_chat) + 7) // 8
+        everyone, any_locality = bytearray(size), bytearray(size)
+        by_locality = {loc: bytearray(size) for loc in self.localities}
+        by_category = {cat: bytearray(size) for cat in CATEGORIES}
+        by_score = [bytearray(size) for _ in range(MAX_SCORE + 1)]
+
+        for slot, (chat_id, prefs) in enumerate(prefs_by_chat.items()):
+            prefs = normalize_prefs(prefs, self.localities)
+            self.slots[chat_id] = slot
+            self.chat_ids.append(chat_id)
+            self.prefs[chat_id] = prefs
+            byte, bit = slot >> 3, 1 << (slot & 7)
+            everyone[byte] |= bit
+            for loc in prefs["localities"]:
+                by_locality[loc][byte] |= bit
+            if not prefs["localities"]:
+                any_locality[byte] |= bit
+            for cat in prefs["categories"] or CATEGORIES:
+                by_category[cat][byte] |= bit
+            for score in range(prefs["min_score"], MAX_SCORE + 1):
+                by_score[score][byte] |= bit
+
+        to_int = lambda data: int.from_bytes(data, "little")
+        self.everyone = to_int(everyone)
+        self.any_locality = to_int(any_locality)
+        self.by_locality = {loc: to_int(data) for loc, data in by_locality.items()}
+        self.by_category = {cat: to_int(data) for cat, data in by_category.items()}
+        self.by_score = [to_int(data) for data in by_score]
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def set(self, chat_id: int, prefs: Optional[Dict] = None) -> Dict:
+        """Add a subscriber or replace their preferences. Returns the normalized preferences."""
+        prefs = normalize_prefs(prefs, self.localities)
+        if chat_id in self.slots:
+            self._clear(self.slots[chat_id])
+        else:
+            slot = self.free_slots.pop() if self.free_slots else len(self.chat_ids)
+            if slot == len(self.chat_ids):
+                self.chat_ids.append(chat_id)
+            else:
+                self.chat_ids[slot] = chat_id
+            self.slots[chat_id] = slot
+        bit = 1 << self.slots[chat_id]
+
+        self.everyone |= bit
+        if prefs["localities"]:
+            for loc in prefs["localities"]:
+                self.by_locality[loc] |= bit
+        else:
+            self.any_locality |= bit
+        for cat in prefs["categories"] or CATEGORIES:
+            self.by_category[cat] |= bit
+        for score in range(prefs["min_score"], MAX_SCORE + 1):
+            self.by_score[score] |= bit
+        self.prefs[chat_id] = prefs
+        return prefs
+
+    def remove(self, chat_id: int):
+        slot = self.slots.pop(chat_id, None)
+        if slot is None:
+            return
+        self._clear(slot)
+        self.chat_ids[slot] = None
+        self.free_slots.append(slot)
+        self.prefs.pop(chat_id, None)
+
+    def _clear(self, slot: int):
+        mask = ~(1 << slot)
+        self.everyone &= mask
+        self.any_locality &= mask
+        for loc in self.by_locality:
+            self.by_locality[loc] &= mask
+        for cat in self.by_category:
+            self.by_category[cat] &= mask
+        for score in range(len(self.by_score)):
+            self.by_score[score] &= mask
+
+    def match(self, item: Dict) -> List[int]:
+        """
+        Chat ids whose preferences accept `item`. Articles that mention no specific
+        locality (region-wide news) pass every locality filter.
+        """
+        localities = [loc for loc in item.get("localities") or [] if loc in self.by_locality]
+        if localities:
+            bitmap = self.any_locality
+            for loc in localities:
+                bitmap |= self.by_locality[loc]
+        else:
+            bitmap = self.everyone
+        bitmap &= self.by_category.get(item.get("type"), self.by_category["news"])
+        score = min(max(int(item.get("score") or MIN_SCORE), MIN_SCORE), MAX_SCORE)
+        bitmap &= self.by_score[score]
+        return self._members(bitmap)
+
+    def _members(self, bitmap: int) -> List[int]:
+        members = []
+        data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+        for offset, value in enumerate(data):
+            if value:
+                base = offset * 8
+                for bit in _BYTE_BITS[value]:
+                    members.append(self.chat_ids[base + bit])
+        return members
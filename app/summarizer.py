@@ -1,36 +1,96 @@
 # app/summarizer.py
+import hashlib
 import logging
-# from transformers import pipeline
+import os
+import queue
+import re
+import threading
+import time
 import warnings
+from collections import OrderedDict
+from concurrent.futures import Future, wait
+from typing import Dict, List, Optional
+
+from app._numpy import load_numpy
+from app.text_utils import tokenize
 
 # Suppress warnings for clean output
 warnings.filterwarnings("ignore")
 
 logger = logging.getLogger(__name__)
 
+# Sentence boundary: terminal punctuation followed by whitespace and a capital/quote/digit
+SENTENCE_RE = re.compile(r'(?<=[.!?…])\s+(?=[«"\dA-ZА-ЯЁӘҒҚҢӨҰҮҺІ])')
+
+TEXTRANK_DAMPING = 0.85
+TEXTRANK_ITERATIONS = 30
+# Extra weight for the lead sentence (news puts the key fact first)
+LEAD_BONUS = 0.3
+
+# --- Optional transformer engine (local weights only, loaded on first use) ---
+USE_AI_SUMMARY = os.getenv("USE_AI_SUMMARY", "false").lower() == "true"
+SUMMARY_MODEL_PATH = os.getenv("SUMMARY_MODEL_PATH", "")
+SUMMARY_QUEUE_SIZE = int(os.getenv("SUMMARY_QUEUE_SIZE", "64"))
+SUMMARY_BATCH_SIZE = int(os.getenv("SUMMARY_BATCH_SIZE", "8"))
+# Queued items older than this are dropped instead of run
+SUMMARY_ITEM_DEADLINE_SEC = float(os.getenv("SUMMARY_ITEM_DEADLINE_SEC", "20"))
+# How long one poll waits for model output before using the extractive summary
+SUMMARY_WAIT_SEC = float(os.getenv("SUMMARY_WAIT_SEC", "2"))
+MODEL_INPUT_CHARS = 1024
+
+# numpy is imported on the first extractive summary; without it summaries are truncated
+NUMPY_FALLBACK = "AI Summarizer: numpy not installed, extractive summaries fall back to truncation."
+
+
+def truncate(text: str, max_chars: int) -> str:
+    return text[:max_chars] + "..." if text and len(text) > max_chars else text
+
+
 class NewsSummarizer:
     """
     AI Summarizer using HuggingFace Transformers.
+
+    The default engine is an offline extractive summarizer (TF-IDF sentence vectors
+    ranked with TextRank, IDF taken over each article's own sentences) that runs per
+    poll in one batch and caches results by content hash.
+
+    With USE_AI_SUMMARY=true and SUMMARY_MODEL_PATH pointing at local weights, a
+    transformer model is loaded in a background thread on first use and fed through
+    a bounded queue. Construction never blocks on the model; while it is loading,
+    failed or overloaded, callers get the extractive summary.
     """
-    def __init__(self):
-        logger.info("AI Summarizer: ML model loading DISABLED for performance stability.")
+    def __init__(self, max_chars: int = 350, cache_size: int = 5000,
+                 use_model: Optional[bool] = None, model_path: Optional[str] = None):
         self.active = False
-        # try:
-        #     self.summarizer = pipeline("summarization", model="sshleifer/distilbart-cnn-12-6")
-        #     self.active = True
-        # except Exception as e:
-        #     logger.error(f"Failed to load ML model: {e}")
-        #     self.active = False
+        self.summarizer = None
+        self.model_path = model_path if model_path is not None else SUMMARY_MODEL_PATH
+        use_model = USE_AI_SUMMARY if use_model is None else use_model
+        # disabled | idle (not loaded yet) | loading | ready | failed
+        self.model_state = "idle" if use_model else "disabled"
+        if not use_model:
+            logger.info("AI Summarizer: ML model DISABLED, using extractive summaries.")
+        self.wait_sec = SUMMARY_WAIT_SEC
+        self.item_deadline_sec = SUMMARY_ITEM_DEADLINE_SEC
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=SUMMARY_QUEUE_SIZE)
+        self._inflight: Dict[str, Future] = {}
+        self._state_lock = threading.Lock()
+
+        self.max_chars = max_chars
+        self.cache_size = cache_size
+        # LRU: engine + content hash -> summary (written by the model worker too)
+        self.cache = OrderedDict()
+        self._cache_lock = threading.Lock()
 
     def summarize(self, text: str, max_length: int = 200, min_length: int = 50) -> str:
         """
         Generate a summary of the provided text.
-        
+
         Args:
             text (str): Text to summarize.
             max_length (int): Max token length.
             min_length (int): Min token length.
-        
+
         Returns:
             str: Summarized text or original text if summarization fails/is too short.
         """
@@ -39,13 +99,230 @@ class NewsSummarizer:
 
         try:
             # Truncate input text to avoid model limits
-            input_text = text[:1024] 
-            
+            input_text = text[:MODEL_INPUT_CHARS]
+
             summary_output = self.summarizer(input_text, max_length=max_length, min_length=min_length, do_sample=False)
             if summary_output and len(summary_output) > 0:
                 summary_text = summary_output[0].get('summary_text', '')
                 return summary_text.strip()
         except Exception as e:
             logger.error(f"Summarization error: {e}")
-            
+
         return text[:max_length] + "..."
+
+    # --- Model engine (background) ---
+
+    def _start_loading(self):
+        with self._state_lock:
+            if self.model_state != "idle":
+                return
+            self.model_state = "loading"
+        threading.Thread(target=self._load_model, name="summarizer-load", daemon=True).start()
+
+    def _load_model(self):
+        started = time.time()
+        if not self.model_path or not os.path.isdir(self.model_path):
+            logger.error(f"AI Summarizer: SUMMARY_MODEL_PATH '{self.model_path}' is not a local model directory, staying extractive.")
+            self.model_state = "failed"
+            return
+        try:
+            from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, pipeline
+            # local_files_only: never reach out to the Hub from a production box
+            tokenizer = AutoTokenizer.from_pretrained(self.model_path, local_files_only=True)
+            model = AutoModelForSeq2SeqLM.from_pretrained(self.model_path, local_files_only=True)
+            self.summarizer = pipeline("summarization", model=model, tokenizer=tokenizer)
+        except Exception as e:
+            logger.error(f"Failed to load ML model: {e}")
+            self.model_state = "failed"
+            return
+        self.active = True
+        self.model_state = "ready"
+        threading.Thread(target=self._model_worker, name="summarizer-worker", daemon=True).start()
+        logger.info(f"AI Summarizer: Model loaded from {self.model_path} in {time.time() - started:.1f}s")
+
+    def _submit(self, key: str, text: str) -> Optional[Future]:
+        """Queue a text for the model. Returns None when the queue is full (overloaded)."""
+        with self._state_lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            future = Future()
+            try:
+                self._queue.put_nowait((key, text, future, time.monotonic() + self.item_deadline_sec))
+            except queue.Full:
+                self.dropped += 1
+                return None
+            self._inflight[key] = future
+            return future
+
+    def _model_worker(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < SUMMARY_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            now = time.monotonic()
+            live = []
+            for job in batch:
+                if job[3] < now:
+                    self.dropped += 1
+                    self._finish(job[0], job[2], None)
+                else:
+                    live.append(job)
+            if not live:
+                continue
+
+            try:
+                outputs = self.summarizer([job[1][:MODEL_INPUT_CHARS] for job in live],
+                                          max_length=120, min_length=30, do_sample=False, truncation=True)
+            except Exception as e:
+                logger.error(f"Summarization error: {e}")
+                outputs = [None] * len(live)
+            for (key, _, future, _), output in zip(live, outputs):
+                summary = (output or {}).get("summary_text", "").strip()
+                summary = truncate(summary, self.max_chars) if summary else None
+                if summary:
+                    # Results that arrive after the poll stopped waiting still serve the next poll
+                    self._remember(key, summary)
+                self._finish(key, future, summary)
+
+    def _finish(self, key: str, future: Future, summary: Optional[str]):
+        with self._state_lock:
+            self._inflight.pop(key, None)
+        future.set_result(summary)
+
+    def status(self) -> Dict:
+        return {
+            "engine": "model" if self.model_state == "ready" else ("extractive" if load_numpy(NUMPY_FALLBACK) else "truncate"),
+            "model_state": self.model_state,
+            "queue_depth": self._queue.qsize(),
+            "dropped": self.dropped,
+        }
+
+    # --- Extractive engine ---
+
+    def _cache_key(self, text: str, engine: str = "extractive") -> str:
+        return hashlib.sha1(f"{engine}:{self.max_chars}:{text}".encode("utf-8")).hexdigest()
+
+    def _cached(self, key: str) -> Optional[str]:
+        with self._cache_lock:
+            summary = self.cache.get(key)
+            if summary is not None:
+                self.cache.move_to_end(key)
+            return summary
+
+    def _remember(self, key: str, summary: str):
+        with self._cache_lock:
+            self.cache[key] = summary
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def summarize_batch(self, texts: List[str]) -> List[str]:
+        """
+        Summarize many texts at once (one call per poll).
+        Short texts pass through, cached texts are free; each summary depends only on its text.
+        If the model is ready, long texts are also queued for it and its output replaces
+        the extractive summary when it arrives within `wait_sec`.
+        """
+        if self.model_state == "idle":
+            self._start_loading()
+        use_model = self.model_state == "ready"
+
+        results = [None] * len(texts)
+        model_jobs = []  # (index, future)
+        pending = []  # (index, cache key, sentences)
+        for i, text in enumerate(texts):
+            if not text or len(text) <= self.max_chars:
+                results[i] = text
+                continue
+            if use_model:
+                model_key = self._cache_key(text, "model")
+                cached = self._cached(model_key)
+                if cached is not None:
+                    results[i] = cached
+                    continue
+                future = self._submit(model_key, text)
+                if future is not None:
+                    model_jobs.append((i, future))
+            key = self._cache_key(text)
+            cached = self._cached(key)
+            if cached is not None:
+                results[i] = cached
+                continue
+            sentences = [s.strip() for s in SENTENCE_RE.split(text) if s.strip()]
+            if len(sentences) < 2 or not load_numpy(NUMPY_FALLBACK):
+                results[i] = truncate(text, self.max_chars)
+                self._remember(key, results[i])
+                continue
+            pending.append((i, key, sentences))
+
+        if pending:
+            for (i, key, sentences), summary in zip(pending, self._extract([p[2] for p in pending])):
+                results[i] = summary
+                self._remember(key, summary)
+
+        if model_jobs:
+            wait([future for _, future in model_jobs], timeout=self.wait_sec)
+            for i, future in model_jobs:
+                if future.done() and future.result():
+                    results[i] = future.result()
+        return results
+
+    def _extract(self, docs: List[List[str]]) -> List[str]:
+        summaries = []
+        for sentences in docs:
+            scores = self._textrank([tokenize(s, min_len=3) for s in sentences])
+            summaries.append(self._select(sentences, scores))
+        return summaries
+
+    def _textrank(self, sentence_tokens: List[List[str]]):
+        np = load_numpy()
+        n = len(sentence_tokens)
+        # IDF over this document's sentences: a summary depends only on its text (it is
+        # cached by content hash), not on which other articles were summarized with it
+        vocab = {}
+        rows, cols = [], []
+        for r, tokens in enumerate(sentence_tokens):
+            for t in tokens:
+                rows.append(r)
+                cols.append(vocab.setdefault(t, len(vocab)))
+        tfidf = np.zeros((n, len(vocab)))
+        np.add.at(tfidf, (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)), 1.0)
+        sentence_freq = (tfidf > 0).sum(axis=0)
+        tfidf *= np.log((1 + n) / (1 + sentence_freq)) + 1.0
+        norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+        tfidf = np.divide(tfidf, norms, out=np.zeros_like(tfidf), where=norms > 0)
+
+        sim = tfidf @ tfidf.T
+        np.fill_diagonal(sim, 0.0)
+        row_sums = sim.sum(axis=1, keepdims=True)
+        transition = np.divide(sim, row_sums, out=np.full_like(sim, 1.0 / n), where=row_sums > 0)
+
+        scores = np.full(n, 1.0 / n)
+        for _ in range(TEXTRANK_ITERATIONS):
+            updated = (1 - TEXTRANK_DAMPING) / n + TEXTRANK_DAMPING * (transition.T @ scores)
+            if np.abs(updated - scores).sum() < 1e-6:
+                scores = updated
+                break
+            scores = updated
+        scores[0] += LEAD_BONUS * scores.max()
+        return scores
+
+    def _select(self, sentences: List[str], scores) -> str:
+        """Best-ranked sentences that fit in max_chars, in original order."""
+        np = load_numpy()
+        chosen = []
+        used = 0
+        for idx in np.argsort(-scores, kind="stable"):
+            length = len(sentences[idx]) + (1 if chosen else 0)
+            if used + length > self.max_chars:
+                continue
+            chosen.append(idx)
+            used += length
+        if not chosen:
+            return truncate(sentences[int(np.argmax(scores))], self.max_chars)
+        return " ".join(sentences[i] for i in sorted(chosen))
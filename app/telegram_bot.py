@@ -1,11 +1,14 @@
 # Trigger Deploy
+import html
 import logging
 import os
 import json
 import requests
 import asyncio
-from typing import Set, List, Dict, Optional
-from datetime import datetime, timedelta
+import time
+from collections import OrderedDict
+from typing import Set, List, Dict, Optional, Tuple
+from datetime import datetime
 from dotenv import load_dotenv
 
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
@@ -19,8 +22,12 @@ from telegram.ext import (
 
 try:
     from app.persistence import Persistence
+    from app.rss_sources import LOCALITY_LABELS
+    from app.subscriber_index import SubscriberIndex, CATEGORIES, MAX_SCORE, normalize_prefs
 except ImportError:
     from persistence import Persistence
+    from rss_sources import LOCALITY_LABELS
+    from subscriber_index import SubscriberIndex, CATEGORIES, MAX_SCORE, normalize_prefs
 
 # 1) Load .env
 load_dotenv()
@@ -29,10 +36,21 @@ BOT_TOKEN = os.getenv("BOT_TOKEN")
 API_URL = os.getenv("API_URL", "https://ulytau-insight.onrender.com")
 BOT_LIMIT = int(os.getenv("BOT_LIMIT", "5"))
 POST_INTERVAL_MIN = int(os.getenv("POST_INTERVAL_MIN", "15"))
+# /latest pagination: items per page and total items offered
+LATEST_PAGE_SIZE = 10
+LATEST_LIMIT = 40
+# /latest waits this long for the API's snapshot before streaming a live poll instead
+LATEST_SNAPSHOT_TIMEOUT_SEC = 5
+# Snapshot versions kept for "load more" buttons (and their rendered messages)
+NEWS_VERSIONS_KEPT = 5
+NEWS_VERSION_TTL_SEC = 6 * 3600
 DISABLE_PREVIEW = os.getenv("DISABLE_PREVIEW", "true").lower() == "true"
 
 # Initialize Persistence
 db = Persistence()
+# Push recipients by preferences (built from db in main())
+sub_index = SubscriberIndex(LOCALITY_LABELS)
+CATEGORY_LABELS = {"news": "Новости", "law": "Законы", "constitution": "Конституция"}
 
 # 3) Configure Logging
 logging.basicConfig(
@@ -43,41 +61,176 @@ logger = logging.getLogger(__name__)
 
 # --- Helper Functions ---
 
-def fetch_news(limit: int = 40) -> List[Dict]:
+# Last /news body, reused when the API answers 304 Not Modified
+_news_cache = {"etag": None, "version": None, "data": []}
+
+# Recent /news snapshots shared by all chats:
+# { version: {"items": [...], "seen_at": ts, "messages": {link: (text, keyboard)}} }.
+# "Load more" buttons carry (version, offset) instead of each user holding a copy.
+_news_versions = OrderedDict()
+
+def remember_news_version(version: str, items: List[Dict]):
+    """Keep a snapshot version for cursors; evicts the oldest and expired versions."""
+    entry = _news_versions.get(version)
+    if entry is None:
+        entry = _news_versions[version] = {"items": items, "seen_at": 0, "messages": {}}
+    entry["seen_at"] = time.time()
+    _news_versions.move_to_end(version)
+    while len(_news_versions) > NEWS_VERSIONS_KEPT:
+        _news_versions.popitem(last=False)
+    expire_news_versions()
+
+def expire_news_versions():
+    cutoff = time.time() - NEWS_VERSION_TTL_SEC
+    for version in [v for v, entry in _news_versions.items() if entry["seen_at"] < cutoff and v != _news_cache["version"]]:
+        del _news_versions[version]
+
+def get_news_version(version: str) -> Optional[List[Dict]]:
+    expire_news_versions()
+    entry = _news_versions.get(version)
+    return entry["items"] if entry else None
+
+def fetch_news(limit: int = 40, timeout: float = 60) -> List[Dict]:
     """
     Fetches news from the local API.
+    Sends the last ETag so unchanged snapshots cost a 304 instead of a full download.
     """
     try:
         url = f"{API_URL}/news"
-        response = requests.get(url, timeout=60)
+        headers = {"If-None-Match": _news_cache["etag"]} if _news_cache["etag"] else {}
+        response = requests.get(url, headers=headers, timeout=timeout)
         response.raise_for_status()
-        payload = response.json()
-        return payload.get("data", [])[:limit]
+        if response.status_code != 304:
+            payload = response.json()
+            _news_cache["data"] = payload.get("data", [])
+            _news_cache["etag"] = response.headers.get("ETag")
+            # Older APIs send no version; the ETag identifies the content just as well
+            _news_cache["version"] = response.headers.get("X-Snapshot-Version") or _news_cache["etag"] or "0"
+        remember_news_version(_news_cache["version"], _news_cache["data"])
+        return _news_cache["data"][:limit]
     except Exception as e:
         logger.error(f"Error in fetch_news: {e}")
         return []
 
-async def send_news_item(update: Update, item: Dict):
-    """Helper to send a formatted news item to a specific update context."""
+def stream_news():
+    """Items from /news/stream as sources complete (used while the API has no snapshot yet)."""
+    with requests.get(f"{API_URL}/news/stream", stream=True, timeout=30) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            record = json.loads(line)
+            if "item" in record:
+                yield record["item"]
+
+async def send_streamed_news(update: Update) -> int:
+    """Send the first LATEST_PAGE_SIZE streamed items as they arrive. Returns how many were sent."""
+    stream = stream_news()
+    sent = 0
+    try:
+        while sent < LATEST_PAGE_SIZE:
+            item = await asyncio.to_thread(next, stream, None)
+            if item is None:
+                break
+            await send_news_item(update, item)
+            sent += 1
+    finally:
+        stream.close()
+    return sent
+
+# --- Rendering ---
+
+def render_news_item(item: Dict, version: Optional[str] = None) -> Tuple[str, InlineKeyboardMarkup]:
+    """
+    HTML text and keyboard for a news item. Cached per kept snapshot `version`
+    (items from /news), so one article broadcast to N subscribers is rendered once;
+    version None (e.g. search results) renders without caching.
+    """
+    key = item.get('link') or item.get('title', '')
+    messages = _news_versions[version]["messages"] if version in _news_versions else None
+    if messages is not None:
+        cached = messages.get(key)
+        if cached is not None:
+            return cached
+
     emoji = "⚖️" if item.get('type') == 'law' else "📰"
-    title = item.get('title', 'No Title').replace("<", "&lt;").replace(">", "&gt;")
-    summary = item.get('summary', '').replace("<", "&lt;").replace(">", "&gt;")
-    link = item.get('link', '')
-    source = item.get('source', 'Unknown')
-    score = item.get('score', 1)
-    
-    stars = "⭐" * score
+    title = html.escape(item.get('title', 'No Title'), quote=False)
+    summary = html.escape(item.get('summary', ''), quote=False)
+    source = html.escape(item.get('source') or 'Unknown', quote=False)
+    stars = "⭐" * item.get('score', 1)
     text = (
         f"{emoji} <b>{title}</b>\n"
         f"Важность: {stars}\n\n"
         f"{summary}\n\n"
         f"<i>Источник: {source}</i>"
     )
-    
     keyboard = InlineKeyboardMarkup([
-        [InlineKeyboardButton("Читать полностью 🔗", url=link)]
+        [InlineKeyboardButton("Читать полностью 🔗", url=item.get('link', ''))]
     ])
-    
+
+    if messages is not None:
+        messages[key] = (text, keyboard)
+    return text, keyboard
+
+# Rendered /week message for the last /digest/week ETag
+_digest_cache = {"etag": None, "text": None}
+
+def render_digest(digest: Dict) -> Optional[str]:
+    """Format the /digest/week payload as an HTML message. None if the week is empty."""
+    top_events = digest.get("top_events", [])
+    laws = digest.get("laws", [])
+    if not top_events and not laws:
+        return None
+
+    start_date = datetime.fromisoformat(digest["window_start"]).strftime("%d.%m")
+    end_date = datetime.fromisoformat(digest["window_end"]).strftime("%d.%m")
+    msg_lines = [f"📅 <b>Главное за неделю ({start_date} - {end_date})</b>\n"]
+
+    if top_events:
+        msg_lines.append("🏆 <b>Топ событий:</b>")
+        for i, item in enumerate(top_events, 1):
+            title = html.escape(item.get('title', 'No Title'), quote=False)
+            link = html.escape(item.get('link', ''))
+            msg_lines.append(f"{i}. <a href='{link}'>{title}</a>")
+        msg_lines.append("") # Spacer
+
+    if laws:
+        msg_lines.append("⚖️ <b>Законы и решения:</b>")
+        for item in laws:
+            title = html.escape(item.get('title', 'No Title'), quote=False)
+            link = html.escape(item.get('link', ''))
+            msg_lines.append(f"• <a href='{link}'>{title}</a>")
+        msg_lines.append("") # Spacer
+
+    msg_lines.append("<i>Нажмите /latest, чтобы увидеть ленту полностью.</i>")
+    return "\n".join(msg_lines)
+
+def fetch_digest_text() -> Optional[str]:
+    """
+    One conditional GET of /digest/week; the message is only re-rendered when the digest changed.
+    Raises on API errors so the handler can report them.
+    """
+    headers = {"If-None-Match": _digest_cache["etag"]} if _digest_cache["etag"] else {}
+    response = requests.get(f"{API_URL}/digest/week", headers=headers, timeout=30)
+    response.raise_for_status()
+    if response.status_code != 304:
+        _digest_cache["text"] = render_digest(response.json())
+        _digest_cache["etag"] = response.headers.get("ETag")
+    return _digest_cache["text"]
+
+def search_news(query: str, limit: int = 5) -> List[Dict]:
+    """Full-text search over past articles via the API's /search endpoint."""
+    try:
+        response = requests.get(f"{API_URL}/search", params={"q": query, "page_size": limit}, timeout=30)
+        response.raise_for_status()
+        return response.json().get("data", [])
+    except Exception as e:
+        logger.error(f"Error in search_news: {e}")
+        return []
+
+async def send_news_item(update: Update, item: Dict, version: Optional[str] = None):
+    """Helper to send a formatted news item to a specific update context."""
+    text, keyboard = render_news_item(item, version)
     try:
         if update.message:
             await update.message.reply_html(
@@ -93,6 +246,7 @@ async def send_news_item(update: Update, item: Dict):
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
     db.add_subscriber(chat_id)
+    sub_index.set(chat_id, db.get_prefs(chat_id))
     
     msg = (
         "👋 Добро пожаловать в <b>Ulytau Inside</b> — ваш персональный агрегатор новостей Улытауской области!\n\n"
@@ -104,6 +258,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "🤖 <b>Команды:</b>\n"
         "• /latest — Свежие новости региона\n"
         "• /subscribe — Включить уведомления\n"
+        "• /settings — Выбрать города, темы и важность\n"
         "• /unsubscribe — Выключить уведомления\n"
         "• /status — Проверить работу системы\n"
         "• /help — Помощь"
@@ -112,6 +267,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def subscribe(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
+    sub_index.set(chat_id, db.get_prefs(chat_id))
     if db.add_subscriber(chat_id):
         await update.message.reply_text("✅ Вы подписаны на уведомления о свежих новостях!")
     else:
@@ -119,6 +275,7 @@ async def subscribe(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def unsubscribe(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
+    sub_index.remove(chat_id)
     if db.remove_subscriber(chat_id):
         await update.message.reply_text("🔕 Уведомления отключены. Вы всегда можете подписаться снова через /subscribe.")
     else:
@@ -129,11 +286,82 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "/latest - Последние новости\n"
         "/subscribe - Включить пуш-уведомления\n"
         "/unsubscribe - Выключить пуш-уведомления\n"
+        "/settings - Фильтры уведомлений\n"
         "/week - Дайджест за неделю\n"
+        "/search <текст> - Поиск по архиву новостей\n"
         "/status - Диагностика API"
     )
     await update.message.reply_text(f"📋 *Доступные команды:*\n\n{commands}", parse_mode=ParseMode.MARKDOWN)
 
+# --- Notification Settings ---
+
+def current_prefs(chat_id: int) -> Dict:
+    return normalize_prefs(db.get_prefs(chat_id), LOCALITY_LABELS)
+
+def settings_text(prefs: Dict) -> str:
+    localities = ", ".join(LOCALITY_LABELS[l] for l in prefs["localities"]) or "все"
+    categories = ", ".join(CATEGORY_LABELS[c] for c in prefs["categories"]) or "все"
+    return (
+        "⚙️ <b>Настройки уведомлений</b>\n\n"
+        f"📍 Населённые пункты: {localities}\n"
+        f"🗂 Темы: {categories}\n"
+        f"⭐ Важность не ниже: {prefs['min_score']}\n\n"
+        "<i>Новости всей области приходят при любом выборе городов.</i>"
+    )
+
+def settings_keyboard(prefs: Dict) -> InlineKeyboardMarkup:
+    mark = lambda on: "✅" if on else "▫️"
+    loc_buttons = [
+        InlineKeyboardButton(f"{mark(loc in prefs['localities'])} {label}", callback_data=f"pref:loc:{loc}")
+        for loc, label in LOCALITY_LABELS.items()
+    ]
+    rows = [loc_buttons[i:i + 2] for i in range(0, len(loc_buttons), 2)]
+    rows.append([InlineKeyboardButton(f"{mark(not prefs['localities'])} Все населённые пункты", callback_data="pref:loc:*")])
+    rows.append([
+        InlineKeyboardButton(f"{mark(not prefs['categories'] or cat in prefs['categories'])} {CATEGORY_LABELS[cat]}", callback_data=f"pref:cat:{cat}")
+        for cat in CATEGORIES
+    ])
+    rows.append([
+        InlineKeyboardButton(f"{'✅' if prefs['min_score'] == s else ''}⭐{s}+", callback_data=f"pref:score:{s}")
+        for s in range(1, MAX_SCORE + 1)
+    ])
+    return InlineKeyboardMarkup(rows)
+
+async def settings(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    prefs = current_prefs(update.effective_chat.id)
+    await update.message.reply_html(settings_text(prefs), reply_markup=settings_keyboard(prefs))
+
+async def settings_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Toggle one preference from the /settings keyboard. Empty locality/category lists mean "all"."""
+    query = update.callback_query
+    await query.answer()
+    chat_id = query.message.chat_id
+    prefs = current_prefs(chat_id)
+    _, kind, value = query.data.split(":", 2)
+
+    if kind == "loc":
+        selected = set(prefs["localities"])
+        if value == "*":
+            selected = set()
+        else:
+            selected ^= {value}
+        prefs["localities"] = list(selected)
+    elif kind == "cat":
+        selected = set(prefs["categories"] or CATEGORIES) ^ {value}
+        # Unticking every category would mute the bot; treat it (and all ticked) as "all"
+        prefs["categories"] = [] if not selected or selected == set(CATEGORIES) else list(selected)
+    elif kind == "score":
+        prefs["min_score"] = int(value)
+
+    prefs = normalize_prefs(prefs, LOCALITY_LABELS)
+    db.set_prefs(chat_id, prefs)
+    if chat_id in sub_index.slots:
+        sub_index.set(chat_id, prefs)
+    try:
+        await query.edit_message_text(settings_text(prefs), parse_mode=ParseMode.HTML, reply_markup=settings_keyboard(prefs))
+    except Exception as e:
+        logger.debug(f"Settings message not updated: {e}")
+
 async def status(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("🔄 Проверяю API...", parse_mode=ParseMode.MARKDOWN)
     
@@ -164,109 +392,55 @@ async def status(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"❌ *API Error*:\nError: `{e}`", parse_mode=ParseMode.MARKDOWN)
 
 async def week(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Generates a weekly digest."""
-    await update.message.reply_text("📅 Готовлю дайджест за неделю...")
-    
+    """Sends the weekly digest (materialized by the API, see /digest/week)."""
     try:
-        # Fetch plenty of news to ensure we cover the week
-        items = fetch_news(100)
-        if not items:
+        text = await asyncio.to_thread(fetch_digest_text)
+        if not text:
             await update.message.reply_text("📭 За эту неделю новостей не найдено.")
             return
-
-        # 1. Date Range Filter (Last 7 days)
-        # Note: API usually returns sorted by importance/date, but strict check is good.
-        # We accept naive dates assuming API returns UTC or similar.
-        now = datetime.now()
-        week_ago = now - timedelta(days=7)
-        
-        digest_items = []
-        for item in items:
-            # We don't have raw date object here easily unless we parse string again 
-            # or trust the API order. API returns 'processed_news' which has string date.
-            # Let's trust the API returned 'fresh' news (logic in rss_parser ensures 7 days).
-            # So we take all items.
-            digest_items.append(item)
-
-        if not digest_items:
-             await update.message.reply_text("📭 За эту неделю новостей не найдено.")
-             return
-
-        # 2. Sort by Score (Desc)
-        digest_items.sort(key=lambda x: x.get('score', 0), reverse=True)
-
-        # 3. Categorize
-        top_events = []
-        laws = []
-        
-        # Take Top 5 High Score items for "Top Events"
-        # Take All "Law" items (max 5)
-        
-        for item in digest_items:
-            # If Law/Constitution -> Add to laws
-            if item.get('type') in ['law', 'constitution']:
-                if len(laws) < 5:
-                    laws.append(item)
-            else:
-                # Regular news
-                if item.get('score', 0) >= 4 and len(top_events) < 5:
-                    top_events.append(item)
-        
-        # If no high score news, take just top 3 regular
-        if not top_events and not laws:
-            top_events = digest_items[:3]
-
-        # 4. Format Message
-        start_date = week_ago.strftime("%d.%m")
-        end_date = now.strftime("%d.%m")
-        
-        msg_lines = [f"📅 <b>Главное за неделю ({start_date} - {end_date})</b>\n"]
-        
-        if top_events:
-            msg_lines.append("🏆 <b>Топ событий:</b>")
-            for i, item in enumerate(top_events, 1):
-                title = item.get('title', 'No Title').replace("<", "&lt;").replace(">", "&gt;")
-                link = item.get('link', '')
-                msg_lines.append(f"{i}. <a href='{link}'>{title}</a>")
-            msg_lines.append("") # Spacer
-
-        if laws:
-            msg_lines.append("⚖️ <b>Законы и решения:</b>")
-            for item in laws:
-                title = item.get('title', 'No Title').replace("<", "&lt;").replace(">", "&gt;")
-                link = item.get('link', '')
-                msg_lines.append(f"• <a href='{link}'>{title}</a>")
-            msg_lines.append("") # Spacer
-            
-        msg_lines.append("<i>Нажмите /latest, чтобы увидеть ленту полностью.</i>")
-        
-        text = "\n".join(msg_lines)
-        
         await update.message.reply_html(text, disable_web_page_preview=True)
 
     except Exception as e:
         logger.error(f"Week digest error: {e}")
         await update.message.reply_text("⚠️ Ошибка при создании дайджеста.")
 
+async def search(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = " ".join(context.args or []).strip()
+    if not query:
+        await update.message.reply_text("ℹ️ Использование: /search <текст>, например: /search Жезқазған су")
+        return
+
+    items = await asyncio.to_thread(search_news, query)
+    if not items:
+        await update.message.reply_text("📭 Ничего не найдено.")
+        return
+    for item in items:
+        await send_news_item(update, item)
+
+def more_keyboard(version: str, offset: int, remaining: int) -> InlineKeyboardMarkup:
+    # Cursor into the shared snapshot: "more:<version>:<offset>" (callback data is capped at 64 bytes)
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton(f"Показать ещё ⬇️ ({remaining})", callback_data=f"more:{version}:{offset}")]
+    ])
+
 async def latest(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user.first_name
     await update.message.reply_text(f"🔍 {user}, ищу свежие новости...")
     
     try:
-        items = fetch_news(40)
+        items = fetch_news(LATEST_LIMIT, timeout=LATEST_SNAPSHOT_TIMEOUT_SEC)
+        if not items and _news_cache["etag"] is None:
+            # No snapshot yet (API cold start): show items as the sources answer
+            if not await send_streamed_news(update):
+                await update.message.reply_text("📭 Новостей пока нет.")
+            return
         if items:
-            page_size = 10
-            to_send = items[:page_size]
-            remaining = items[page_size:]
-            context.user_data['remaining_news'] = remaining
+            version = _news_cache["version"]
+            for item in items[:LATEST_PAGE_SIZE]:
+                await send_news_item(update, item, version)
             
-            for item in to_send:
-                await send_news_item(update, item)
-            
-            if remaining:
-                keyboard = InlineKeyboardMarkup([
-                    [InlineKeyboardButton(f"Показать ещё ⬇️ ({len(remaining)})", callback_data="load_more")]
-                ])
+            if len(items) > LATEST_PAGE_SIZE:
+                keyboard = more_keyboard(version, LATEST_PAGE_SIZE, len(items) - LATEST_PAGE_SIZE)
                 await update.message.reply_text("Хотите прочитать ещё?", reply_markup=keyboard)
         else:
             await update.message.reply_text("📭 Новостей пока нет.")
@@ -277,49 +451,39 @@ async def latest(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def load_more_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
-    
-    remaining = context.user_data.get('remaining_news', [])
-    if not remaining:
+
+    items = None
+    # Buttons sent before cursors existed say just "load_more"; malformed data is treated the same
+    if query.data.startswith("more:"):
+        try:
+            _, version, offset = query.data.rsplit(":", 2)
+            offset = int(offset)
+        except ValueError:
+            offset = -1
+        if offset >= 0:
+            items = get_news_version(version)
+    if items is None:
+        await query.edit_message_text("⌛ Этот список устарел. Нажмите /latest, чтобы получить свежие новости.")
+        return
+
+    items = items[:LATEST_LIMIT]
+    to_send = items[offset:offset + LATEST_PAGE_SIZE]
+    if not to_send:
         await query.edit_message_text("Больше новостей нет.")
         return
-        
-    page_size = 10
-    to_send = remaining[:page_size]
-    new_remaining = remaining[page_size:]
-    context.user_data['remaining_news'] = new_remaining
     
     for item in to_send:
-        await send_news_item_direct(query.message.chat_id, context, item)
+        await send_news_item_direct(query.message.chat_id, context, item, version)
         
-    if new_remaining:
-        keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton(f"Показать ещё ⬇️ ({len(new_remaining)})", callback_data="load_more")]
-        ])
-        await query.message.reply_text("Продолжить чтение?", reply_markup=keyboard)
+    next_offset = offset + len(to_send)
+    if next_offset < len(items):
+        await query.message.reply_text("Продолжить чтение?", reply_markup=more_keyboard(version, next_offset, len(items) - next_offset))
     else:
         await query.message.reply_text("✅ Вы просмотрели все найденные новости.")
 
-async def send_news_item_direct(chat_id: int, context: ContextTypes.DEFAULT_TYPE, item: Dict):
+async def send_news_item_direct(chat_id: int, context: ContextTypes.DEFAULT_TYPE, item: Dict, version: Optional[str] = None):
     """Universal helper to send news to a specific chat_id."""
-    emoji = "⚖️" if item.get('type') == 'law' else "📰"
-    title = item.get('title', 'No Title').replace("<", "&lt;").replace(">", "&gt;")
-    summary = item.get('summary', '').replace("<", "&lt;").replace(">", "&gt;")
-    link = item.get('link', '')
-    source = item.get('source', 'Unknown')
-    score = item.get('score', 1)
-    stars = "⭐" * score
-    
-    text = (
-        f"{emoji} <b>{title}</b>\n"
-        f"Важность: {stars}\n\n"
-        f"{summary}\n\n"
-        f"<i>Источник: {source}</i>"
-    )
-    
-    keyboard = InlineKeyboardMarkup([
-        [InlineKeyboardButton("Читать полностью 🔗", url=link)]
-    ])
-    
+    text, keyboard = render_news_item(item, version)
     try:
         await context.bot.send_message(
             chat_id=chat_id,
@@ -340,11 +504,11 @@ async def monitor_news_job(context: ContextTypes.DEFAULT_TYPE):
     if not items:
         return
 
-    subscribers = db.get_subscribers()
-    if not subscribers:
+    if not len(sub_index):
         return
 
     count = 0
+    sends = 0
     MAX_PER_CHECK = 3 # Anti-spam: limit news items per burst
     
     for item in reversed(items): # Process oldest to newest so they appear in order
@@ -358,16 +522,17 @@ async def monitor_news_job(context: ContextTypes.DEFAULT_TYPE):
         if not link or db.is_seen(link):
             continue
         
-        # New article found! Notify all subscribers
-        for chat_id in subscribers:
-            await send_news_item_direct(chat_id, context, item)
+        # New article found! Notify subscribers whose filters accept it (rendered once, see render_news_item)
+        for chat_id in sub_index.match(item):
+            await send_news_item_direct(chat_id, context, item, _news_cache["version"])
             await asyncio.sleep(0.1) # Brief pause to avoid flood
+            sends += 1
             
         db.add_seen(link)
         count += 1
         
     if count > 0:
-        logger.info(f"Smart Monitor: Sent {count} new articles to {len(subscribers)} subscribers.")
+        logger.info(f"Smart Monitor: Sent {count} new articles ({sends} messages, {len(sub_index)} subscribers).")
 
 async def run_scheduler_fallback(application, interval_sec):
     """Fallback loop if JobQueue is missing."""
@@ -415,6 +580,7 @@ async def main():
         job_queue_available = False
 
     logger.info(f"🤖 Запуск бота... Подписчиков в базе: {len(db.get_subscribers())}")
+    sub_index.load({chat_id: db.get_prefs(chat_id) for chat_id in db.get_subscribers()})
     
     application = ApplicationBuilder().token(BOT_TOKEN).build()
     
@@ -425,8 +591,11 @@ async def main():
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("latest", latest))
     application.add_handler(CommandHandler("week", week))
+    application.add_handler(CommandHandler("search", search))
     application.add_handler(CommandHandler("status", status))
-    application.add_handler(CallbackQueryHandler(load_more_callback, pattern="^load_more$"))
+    application.add_handler(CommandHandler("settings", settings))
+    application.add_handler(CallbackQueryHandler(load_more_callback, pattern="^(load_more$|more:)"))
+    application.add_handler(CallbackQueryHandler(settings_callback, pattern="^pref:"))
     
     # Background Job (Interval: every X minutes)
     job_queue = application.job_queue
@@ -0,0 +1,70 @@
+# app/text_utils.py
+"""
+Russian/Kazakh-aware tokenization and light stemming.
+Shared by the extractive summarizer and the search index.
+"""
+import re
+from functools import lru_cache
+from typing import List
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Frequent function words that carry no topic signal
+STOPWORDS = frozenset("""
+и в во не что он на я с со как а то все она так его но да ты к у же вы за бы по только ее мне было вот от
+меня еще нет о из ему теперь когда даже ну ли если уже или ни быть был него до вас опять уж вам ведь там
+потом себя ничего ей может они тут где есть надо ней для мы тебя их чем была сам без чего раз тоже себе под
+будет ж тогда кто этот того потому этого какой ним здесь этом один мой тем чтобы нее сейчас были куда всех
+можно при два об другой после над больше тот через эти нас про всего них много три эту этой перед том также
+который которая которые которых это году года также более
+және мен бен пен да де та те бұл осы сол ол үшін деп болып еді бар жоқ бір екі сен біз сіз олар оның
+оған одан мұнда сонда қазір ғана тек әрі немесе ретінде бойынша туралы арқылы кезінде жылы
+""".split())
+
+# Light suffix stripping: longest match first, repeated (Kazakh stacks plural/possessive/case).
+# Possessive forms before a case ending take an "н" infix ("қала-сы-н-да"), hence сын/сін.
+RU_SUFFIXES = """
+иями ями ами иях ях ах ией ием ем ом ей ой ий ый ая яя ое ее ые ие ого его ому ему ыми ими
+ость ости остью ов ев ам ям ую юю ешь ет ют ут ит ят ать ять ить еть
+а я о е ы и у ю ь
+""".split()
+KZ_SUFFIXES = """
+лар лер дар дер тар тер
+ның нің дың дің тың тің ға ге қа ке на не ны ні ды ді ты ті
+да де та те дан ден тан тен нан нен дағы дегі тағы тегі
+сы сі сын сін ы і ымен імен мен бен пен
+""".split()
+RU_SUFFIXES = sorted(RU_SUFFIXES, key=len, reverse=True)
+KZ_SUFFIXES = sorted(KZ_SUFFIXES, key=len, reverse=True)
+# Letters that only occur in Kazakh: words containing them get the Kazakh suffix set
+KZ_LETTERS = frozenset("әғқңөұүһі")
+MIN_STEM = 2
+STEM_PASSES = 3
+
+
+def normalize(text: str) -> str:
+    return text.lower().replace("ё", "е")
+
+
+@lru_cache(maxsize=200_000)  # News vocabulary is small and repetitive
+def stem(token: str) -> str:
+    """Strip up to STEM_PASSES inflectional suffixes, never leaving fewer than MIN_STEM letters."""
+    suffixes = KZ_SUFFIXES if not KZ_LETTERS.isdisjoint(token) else RU_SUFFIXES
+    for _ in range(STEM_PASSES):
+        for suffix in suffixes:
+            if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM:
+                token = token[:-len(suffix)]
+                break
+        else:
+            break
+    return token
+
+
+def tokenize(text: str, min_len: int = 1, use_stem: bool = True, drop_stopwords: bool = True) -> List[str]:
+    """Lowercase words, optionally without stopwords and stemmed."""
+    tokens = []
+    for word in WORD_RE.findall(normalize(text)):
+        if len(word) < min_len or (drop_stopwords and word in STOPWORDS):
+            continue
+        tokens.append(stem(word) if use_stem else word)
+    return tokens
@@ -0,0 +1,241 @@
+"""
+Offline benchmark for the ingest pipeline.
+
+Replays the recorded payloads listed in bench_fixtures/manifest.json through
+RSSParser.parse_source (parsing) and RSSParser.process_entries (filtering and
+scoring) without touching the network, then compares the numbers against
+bench_fixtures/baseline.json.
+
+Only the pipeline output (item counts) is a hard gate. Timings are the fastest of
+--repeat passes, divided by a fixed calibration workload timed the same way, so a
+slower or busier machine does not look like a regression; drift beyond --tolerance
+is reported as a warning (or fails with --strict-timing), as is peak memory.
+
+Usage:
+    python bench_pipeline.py                   # run and compare against baseline
+    python bench_pipeline.py --strict-timing   # also fail on timing/memory drift
+    python bench_pipeline.py --update-baseline # record a new baseline
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.rss_parser import RSSParser, FRESHNESS_DAYS
+from app.summarizer import NewsSummarizer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_fixtures")
+MANIFEST_PATH = os.path.join(FIXTURES_DIR, "manifest.json")
+BASELINE_PATH = os.path.join(FIXTURES_DIR, "baseline.json")
+
+# Metrics where a bigger number is a regression (warnings unless --strict-timing)
+TIMING_METRICS = ["parse_ms", "process_ms", "total_ms", "summarize_ms"]
+MEMORY_METRICS = ["peak_kb"]
+# Metrics that must match the baseline exactly (pipeline output changed): the hard gate
+EXACT_METRICS = ["raw_items", "accepted_items", "summarized_items"]
+CALIBRATION_ROUNDS = 7
+
+logging.basicConfig(level=logging.ERROR)
+
+
+def load_fixtures():
+    with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    fixtures = []
+    for fx in manifest["fixtures"]:
+        with open(os.path.join(FIXTURES_DIR, fx["file"]), "rb") as f:
+            fixtures.append((fx["source"], f.read()))
+    return datetime.fromisoformat(manifest["recorded_at"]), fixtures
+
+
+def run_once(parser: RSSParser, fixtures, now: datetime):
+    """One full pass over the corpus. Returns (per-stage ms, per-source ms, raw, accepted)."""
+    per_source = {}
+    raw_entries = []
+    horizon = now - timedelta(days=FRESHNESS_DAYS)
+
+    t0 = time.perf_counter()
+    for source, content in fixtures:
+        s_t = time.perf_counter()
+        raw_entries.extend(parser.parse_source(source, content, horizon))
+        per_source[source["name"]] = (time.perf_counter() - s_t) * 1000
+    t1 = time.perf_counter()
+    accepted = parser.process_entries(raw_entries, now=now)
+    t2 = time.perf_counter()
+
+    stages = {"parse_ms": (t1 - t0) * 1000, "process_ms": (t2 - t1) * 1000}
+    return stages, per_source, raw_entries, accepted
+
+
+def calibrate() -> float:
+    """
+    Fastest of CALIBRATION_ROUNDS runs of a fixed pure-Python workload (XML parsing,
+    string and dict work, like the pipeline), in ms. Timings are reported relative to it.
+    """
+    import xml.etree.ElementTree as ET
+    doc = "<rss><channel>" + "".join(
+        f"<item><title>Title {i}</title><description>{'Ұлытау облысы жаңалықтары. ' * 8}</description></item>"
+        for i in range(1500)
+    ) + "</channel></rss>"
+    best = float("inf")
+    for _ in range(CALIBRATION_ROUNDS):
+        t0 = time.perf_counter()
+        counts = {}
+        for item in ET.fromstring(doc).iter("item"):
+            for word in item.findtext("description").lower().split():
+                counts[word] = counts.get(word, 0) + 1
+        sorted(counts.items(), key=lambda kv: kv[1])
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def run_summarizer(raw_entries) -> tuple:
+    """Cold-cache extractive summarization of every raw entry. Returns (ms, texts actually summarized)."""
+    summarizer = NewsSummarizer()
+    texts = [e.summary for e in raw_entries]
+    t0 = time.perf_counter()
+    summarizer.summarize_batch(texts)
+    elapsed = (time.perf_counter() - t0) * 1000
+    return elapsed, sum(1 for t in texts if t and len(t) > summarizer.max_chars)
+
+
+def run_benchmark(repeat: int):
+    now, fixtures = load_fixtures()
+    parser = RSSParser()
+
+    # Warm-up pass (imports, regex compilation, lazy caches)
+    run_once(parser, fixtures, now)
+
+    stage_runs = {"parse_ms": [], "process_ms": [], "summarize_ms": []}
+    source_runs = {}
+    for _ in range(repeat):
+        stages, per_source, raw_entries, accepted = run_once(parser, fixtures, now)
+        for k, v in stages.items():
+            stage_runs[k].append(v)
+        summarize_ms, summarized = run_summarizer(raw_entries)
+        stage_runs["summarize_ms"].append(summarize_ms)
+        for k, v in per_source.items():
+            source_runs.setdefault(k, []).append(v)
+
+    # Memory is measured on a separate pass: tracemalloc slows everything down
+    tracemalloc.start()
+    run_once(parser, fixtures, now)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Fastest pass: the least disturbed by other load on the machine
+    results = {k: round(min(v), 2) for k, v in stage_runs.items()}
+    results["total_ms"] = round(results["parse_ms"] + results["process_ms"], 2)
+    results["raw_items"] = len(raw_entries)
+    results["accepted_items"] = len(accepted)
+    results["items_per_sec"] = round(len(raw_entries) / (results["total_ms"] / 1000), 1) if results["total_ms"] else 0
+    results["summarized_items"] = summarized
+    results["summarize_ms_per_item"] = round(results["summarize_ms"] / summarized, 3) if summarized else 0
+    results["peak_kb"] = round(peak / 1024, 1)
+    results["payload_kb"] = round(sum(len(c) for _, c in fixtures) / 1024, 1)
+    results["calibration_ms"] = round(calibrate(), 2)
+    per_source = {k: round(min(v), 2) for k, v in source_runs.items()}
+    return results, per_source
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> tuple:
+    """
+    Return (regressions, warnings), human-readable. Regressions: pipeline output changed.
+    Warnings: timings (relative to the calibration workload) or memory above baseline + tolerance.
+    """
+    regressions = []
+    for key in EXACT_METRICS:
+        base = baseline.get(key)
+        if base is not None and results[key] != base:
+            regressions.append(f"{key}: {results[key]} != {base} (pipeline output changed)")
+
+    warnings = []
+    calibrated = baseline.get("calibration_ms") and results.get("calibration_ms")
+    for key in TIMING_METRICS:
+        base = baseline.get(key)
+        if base is None: continue
+        if calibrated:
+            current, reference = results[key] / results["calibration_ms"], base / baseline["calibration_ms"]
+            label = f"{key}: {current:.2f}x calibration > {reference:.2f}x"
+        else:
+            current, reference = results[key], base
+            label = f"{key}: {current} > {base}"
+        if current > reference * (1 + tolerance):
+            warnings.append(f"{label} (+{int(tolerance * 100)}% allowed)")
+    for key in MEMORY_METRICS:
+        base = baseline.get(key)
+        if base is not None and results[key] > base * (1 + tolerance):
+            warnings.append(f"{key}: {results[key]} > {base} (+{int(tolerance * 100)}% allowed)")
+    return regressions, warnings
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Offline ingest pipeline benchmark")
+    ap.add_argument("--repeat", type=int, default=5, help="Timed passes (the fastest is reported)")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    ap.add_argument("--strict-timing", action="store_true", help="Fail (not just warn) on timing/memory drift")
+    ap.add_argument("--update-baseline", action="store_true", help="Write current results as the new baseline")
+    ap.add_argument("--items-per-poll", type=int, default=1000, help="Long items per poll assumed for the summary budget")
+    ap.add_argument("--summary-budget-ms", type=float, default=5000, help="Max summarization time per poll")
+    args = ap.parse_args()
+
+    results, per_source = run_benchmark(args.repeat)
+
+    print(f"{'Stage':<24} | {'Value':>12}")
+    print("-" * 40)
+    for key, value in results.items():
+        print(f"{key:<24} | {value:>12}")
+    print()
+    print(f"{'Source (parse)':<40} | {'ms':>8}")
+    print("-" * 52)
+    for name, ms in per_source.items():
+        print(f"{name:<40} | {ms:>8}")
+    print()
+
+    # Summarization has to fit in the refresh cycle regardless of the baseline
+    projected = results["summarize_ms_per_item"] * args.items_per_poll
+    print(f"Summarizer: {projected:.0f} ms projected for {args.items_per_poll} long items (budget {args.summary_budget_ms:.0f} ms)")
+    if projected > args.summary_budget_ms:
+        print("❌ Summarizer exceeds the per-poll budget.")
+        return 1
+
+    if args.update_baseline:
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+
+    if not os.path.exists(BASELINE_PATH):
+        print("No baseline found. Run with --update-baseline first.")
+        return 1
+
+    with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions, warnings = compare(results, baseline, args.tolerance)
+    if warnings:
+        print("⚠️ Slower than baseline (timings are machine-dependent):")
+        for w in warnings:
+            print(f"   {w}")
+    if regressions:
+        print("❌ REGRESSION against baseline:")
+        for r in regressions:
+            print(f"   {r}")
+        return 1
+    if warnings and args.strict_timing:
+        return 1
+
+    print("✅ Within baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
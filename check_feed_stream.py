@@ -0,0 +1,65 @@
+"""
+Regression check for the streaming feed parser's feedparser fallback.
+
+A feed that breaks XMLPullParser early (an HTML entity such as &nbsp; in the
+first chunk) must still yield every item: the fallback has to see the whole
+stream, not just the chunks read before the error.
+
+Usage:
+    python check_feed_stream.py
+"""
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.feed_stream import parse_feed_stream
+
+ITEMS = 100
+CHUNK_SIZE = 4096
+
+
+def build_feed() -> bytes:
+    items = []
+    for i in range(ITEMS):
+        items.append(
+            f"<item><title>Жезқазған news {i}</title><link>https://example.kz/news/{i}</link>"
+            f"<description>{'Ұлытау облысы. ' * 20}</description>"
+            f"<pubDate>Tue, 20 Jan 2026 {i % 24:02d}:00:00 +0000</pubDate></item>"
+        )
+    # &nbsp; is not an XML entity: the pull parser fails inside the first chunk
+    return ("<?xml version=\"1.0\" encoding=\"UTF-8\"?><rss version=\"2.0\"><channel>"
+            "<title>Test&nbsp;feed</title>" + "".join(items) + "</channel></rss>").encode("utf-8")
+
+
+def main():
+    body = build_feed()
+    chunks = [body[i:i + CHUNK_SIZE] for i in range(0, len(body), CHUNK_SIZE)]
+    failures = []
+
+    entries, stats = parse_feed_stream(iter(chunks))
+    if not stats["fallback"]:
+        failures.append("expected the feedparser fallback to be used")
+    if len(entries) != ITEMS:
+        failures.append(f"fallback returned {len(entries)} of {ITEMS} items")
+    if stats["bytes"] != len(body):
+        failures.append(f"read {stats['bytes']} of {len(body)} bytes")
+
+    # The byte budget still applies to the rest of the stream
+    limit = len(body) // 2
+    _, stats = parse_feed_stream(iter(chunks), max_bytes=limit)
+    if stats["bytes"] != limit or not stats["truncated"]:
+        failures.append(f"max_bytes not enforced after fallback ({stats['bytes']} bytes read, limit {limit})")
+
+    print(f"{len(body) // 1024} KB feed in {len(chunks)} chunks: {len(entries)} entries")
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ Fallback parsed the whole stream.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -28,8 +28,8 @@ for source in parser.sources:
         
         # Print first entry title for verification if it's a telegram source
         if source.get("type") == "telegram" and count > 0:
-             print(f"   [Latest]: {entries[0]['title'][:80]}...")
-             print(f"   [Date]: {entries[0]['published']}")
+             print(f"   [Latest]: {entries[0].title[:80]}...")
+             print(f"   [Date]: {entries[0].published}")
              print("-" * 40)
 
     except Exception as e:
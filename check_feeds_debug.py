@@ -28,9 +28,9 @@ for source in parser.sources:
         
         filtered_debug = []
         for entry in entries:
-            title = entry.get("title", "")
-            summary = parser.clean_text(entry.get("summary", ""))
-            link = entry.get("link", "")
+            title = entry.title
+            summary = parser.clean_text(entry.summary)
+            link = entry.link
             
             # Replicate filtering checks
             full_text_lower = f"{title} {summary}".lower()
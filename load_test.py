@@ -0,0 +1,103 @@
+"""
+Load driver for the /news API.
+
+Calls the endpoint concurrently and reports latency percentiles and throughput,
+then summarises circuit breaker / source state from /debug/sources.
+Pair with mock_upstream.py to run against controlled upstream behaviour.
+
+    python load_test.py --url http://127.0.0.1:8000/news --concurrency 20 --requests 200
+"""
+import argparse
+import concurrent.futures
+import sys
+import threading
+import time
+from collections import Counter
+
+import requests
+
+_local = threading.local()
+
+
+def session() -> requests.Session:
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    return _local.session
+
+
+def one_call(url: str, timeout: float):
+    """Returns (latency_sec, status_code or error string, item count)."""
+    start = time.perf_counter()
+    try:
+        r = session().get(url, timeout=timeout)
+        elapsed = time.perf_counter() - start
+        count = 0
+        if r.status_code == 200:
+            try:
+                count = r.json().get("count", 0)
+            except ValueError:
+                pass
+        return elapsed, r.status_code, count
+    except Exception as e:
+        return time.perf_counter() - start, type(e).__name__, 0
+
+
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Concurrent load driver for /news")
+    ap.add_argument("--url", default="http://127.0.0.1:8000/news")
+    ap.add_argument("--concurrency", type=int, default=10)
+    ap.add_argument("--requests", type=int, default=100, help="Total requests to send")
+    ap.add_argument("--timeout", type=float, default=60.0)
+    args = ap.parse_args()
+
+    results = []
+    wall_start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [executor.submit(one_call, args.url, args.timeout) for _ in range(args.requests)]
+        for f in concurrent.futures.as_completed(futures):
+            results.append(f.result())
+    wall = time.perf_counter() - wall_start
+
+    latencies = sorted(r[0] * 1000 for r in results)
+    statuses = Counter(r[1] for r in results)
+    ok = statuses.get(200, 0)
+
+    print(f"Requests:    {len(results)} (concurrency {args.concurrency}) in {wall:.2f}s")
+    print(f"Throughput:  {len(results) / wall:.1f} req/s")
+    print(f"Successes:   {ok}/{len(results)}")
+    if latencies:
+        print(f"Latency ms:  p50={percentile(latencies, 50):.0f}  p90={percentile(latencies, 90):.0f}  "
+              f"p99={percentile(latencies, 99):.0f}  max={latencies[-1]:.0f}")
+    else:
+        print("Latency ms:  n/a (no requests completed)")
+    print(f"Statuses:    {dict(statuses)}")
+    counts = [r[2] for r in results if r[1] == 200]
+    if counts:
+        print(f"Items/resp:  min={min(counts)} max={max(counts)}")
+
+    # Source / breaker summary from the service itself
+    base = args.url.rsplit("/news", 1)[0]
+    try:
+        sources = requests.get(f"{base}/debug/sources", timeout=10).json().get("sources", [])
+        circuits = Counter(s.get("circuit") for s in sources)
+        errors = Counter((s.get("error") or "")[:60] for s in sources if not s.get("ok"))
+        not_modified = sum(1 for s in sources if s.get("not_modified"))
+        print(f"Sources:     {len(sources)} total, {sum(1 for s in sources if s.get('ok'))} ok, {not_modified} not modified (304)")
+        print(f"Circuits:    {dict(circuits)}")
+        for err, n in errors.most_common(5):
+            print(f"   {n:>4} x {err}")
+    except Exception as e:
+        print(f"Could not read /debug/sources: {e}")
+
+    return 0 if results and ok == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
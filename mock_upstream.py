@@ -0,0 +1,262 @@
+"""
+Local stand-in for upstream news sources, used for end-to-end load testing.
+
+Serves synthetic RSS feeds, html_list pages and Telegram (t.me/s/...) pages with
+configurable latency, failure injection and ETag-based 304 support,
+and writes a matching source list that the API can be pointed at:
+
+    python mock_upstream.py --sources 300 --delay lognormal:-1.5,0.8 --error-rate 0.05
+    SOURCES_FILE=mock_sources.json uvicorn app.main:app --port 8000
+    python load_test.py --url http://127.0.0.1:8000/news --concurrency 20 --requests 200
+"""
+import argparse
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("mock_upstream")
+
+# Vocabulary for synthetic items (mix of local, foreign and legislative news)
+LOCAL_PLACES = ["Жезказгане", "Каражале", "Улытауской области", "Жезқазған қаласында", "Ұлытау облысында", "г. Сатпаев"]
+OTHER_PLACES = ["Астане", "Алматы", "Шымкенте", "Караганде", "Актобе"]
+TOPICS = [
+    "отремонтируют {n} км дорог", "открыли новую школу на {n} мест", "выделят {n} млн тенге на водоснабжение",
+    "утвердили постановление о тарифах", "приняли закон о местном самоуправлении", "обсудили поправки в Конституцию",
+    "построят {n} жилых домов", "провели турнир по борьбе",
+]
+SENTENCES = [
+    "Об этом сообщили в пресс-службе акимата.", "Финансирование предусмотрено из местного бюджета.",
+    "Жители давно ждали этого решения.", "Подробности будут объявлены позже.",
+    "Контроль за исполнением возложен на заместителя акима.",
+]
+
+SOURCE_TYPES = ["rss", "html_list", "telegram"]
+
+
+class DelayModel:
+    """Latency distribution parsed from 'fixed:S', 'uniform:A,B', 'lognormal:MU,SIGMA' or 'exp:MEAN'."""
+
+    def __init__(self, spec: str):
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = [float(p) for p in params.split(",") if p]
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.params[0] if self.params else 0.0
+        if self.kind == "uniform":
+            return rng.uniform(self.params[0], self.params[1])
+        if self.kind == "lognormal":
+            return rng.lognormvariate(self.params[0], self.params[1])
+        if self.kind == "exp":
+            return rng.expovariate(1.0 / self.params[0])
+        return 0.0
+
+
+class MockUpstream:
+    """Generates payloads and decides per-request behaviour (delay, error, 304)."""
+
+    def __init__(self, args):
+        self.args = args
+        self.delay = DelayModel(args.delay)
+        self.lock = threading.Lock()
+        self.rng = random.Random(args.seed)
+        self.stats = {"requests": 0, "ok": 0, "not_modified": 0, "errors": 0, "rate_limited": 0, "hangs": 0}
+        # A fixed fraction of sources is permanently broken (exercises circuit breakers)
+        dead_rng = random.Random(args.seed + 1)
+        self.dead = {i for i in range(args.sources) if dead_rng.random() < args.dead_rate}
+
+    def source_list(self, base_url: str):
+        sources = []
+        for i in range(self.args.sources):
+            stype = SOURCE_TYPES[i % len(SOURCE_TYPES)]
+            path = {"rss": f"/rss/{i}.xml", "html_list": f"/html/{i}", "telegram": f"/s/mock_channel_{i}"}[stype]
+            sources.append({"name": f"Mock {stype} #{i}", "url": base_url + path, "type": stype})
+        return sources
+
+    def content_version(self, source_id: int) -> int:
+        """Payload version: changes every --change-every seconds (staggered per source)."""
+        if self.args.change_every <= 0:
+            return int(time.time() * 1000)
+        return int((time.time() + source_id * 7) // self.args.change_every)
+
+    def build_items(self, source_id: int, version: int):
+        rng = random.Random(source_id * 100003 + version)
+        now = datetime.now(timezone.utc)
+        items = []
+        for j in range(self.args.items):
+            place = rng.choice(LOCAL_PLACES) if rng.random() < 0.5 else rng.choice(OTHER_PLACES)
+            title = f"В {place} " + rng.choice(TOPICS).format(n=rng.randint(2, 300))
+            body = " ".join(rng.sample(SENTENCES, 3))
+            published = now - timedelta(hours=j * 3 + rng.randint(0, 2), minutes=rng.randint(0, 59))
+            items.append((f"{version}-{j}", title, body, published))
+        return items
+
+    def padding(self) -> str:
+        return "<!-- " + "x" * (self.args.payload_kb * 1024) + " -->" if self.args.payload_kb else ""
+
+    def render(self, kind: str, source_id: int, version: int, base_url: str, before: int = 0) -> bytes:
+        items = self.build_items(source_id, version)
+        if kind == "rss":
+            body = "".join(
+                f"<item><title>{escape(t)}</title><link>{base_url}/article/{source_id}/{k}</link>"
+                f"<pubDate>{format_datetime(p)}</pubDate><description><![CDATA[<p>{d}</p>]]></description></item>"
+                for k, t, d, p in items
+            )
+            doc = f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>Mock {source_id}</title>{body}</channel></rss>{self.padding()}'
+        elif kind == "html_list":
+            body = "".join(
+                f'<div class="news-item"><a href="{base_url}/article/{source_id}/{k}">{escape(t)}</a>'
+                f'<span class="date">{p.strftime("%d.%m.%Y")}</span></div>'
+                for k, t, d, p in items
+            )
+            doc = f'<!DOCTYPE html><html><head><meta charset="utf-8"></head><body>{body}{self.padding()}</body></html>'
+        else:
+            # Telegram lists oldest first, newest last; post ids grow with recency.
+            # ?before=<id> returns the page of posts just older than <id> (dates shifted back).
+            top = version * 1000 + len(items)
+            start = min(top, before - 1) if before else top
+            shift = timedelta(hours=3 * (top - start))
+            body = "".join(
+                f'<div class="tgme_widget_message_wrap js-widget_message_wrap"><div class="tgme_widget_message" data-post="mock_channel_{source_id}/{start - j}">'
+                f'<div class="tgme_widget_message_text js-message_text" dir="auto">{escape(t)}. {d}</div>'
+                f'<a class="tgme_widget_message_date" href="{base_url}/mock_channel_{source_id}/{start - j}"><time datetime="{(p - shift).isoformat()}" class="time">{p.strftime("%H:%M")}</time></a>'
+                f'</div></div>'
+                for j, (k, t, d, p) in reversed(list(enumerate(items))) if start - j > 0
+            )
+            doc = f'<!DOCTYPE html><html><head><meta charset="utf-8"></head><body><section class="tgme_channel_history">{body}</section>{self.padding()}</body></html>'
+        return doc.encode("utf-8")
+
+    def decide(self):
+        """Pick the behaviour for one request: ('ok'|'error'|'rate_limit'|'hang', delay_sec)."""
+        with self.lock:
+            roll = self.rng.random()
+            delay = self.delay.sample(self.rng)
+        if roll < self.args.hang_rate:
+            return "hang", self.args.hang_sec
+        roll -= self.args.hang_rate
+        if roll < self.args.error_rate:
+            return "error", delay
+        roll -= self.args.error_rate
+        if roll < self.args.ratelimit_rate:
+            return "rate_limit", delay
+        return "ok", delay
+
+    def count(self, key: str):
+        with self.lock:
+            self.stats[key] += 1
+
+
+def make_handler(upstream: MockUpstream):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            pass  # Per-request logging would dominate CPU under load
+
+        def send_body(self, status: int, body: bytes, content_type: str, extra_headers=None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (extra_headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+
+        def do_GET(self):
+            base_url = f"http://{self.headers.get('Host', f'127.0.0.1:{upstream.args.port}')}"
+            path, _, query = self.path.partition("?")
+            before = int(parse_qs(query).get("before", ["0"])[0] or 0)
+
+            if path == "/sources.json":
+                body = json.dumps(upstream.source_list(base_url), ensure_ascii=False).encode("utf-8")
+                return self.send_body(200, body, "application/json")
+            if path == "/stats":
+                return self.send_body(200, json.dumps(upstream.stats).encode("utf-8"), "application/json")
+
+            if path.startswith("/rss/"):
+                kind, source_id = "rss", int(path[5:].split(".")[0])
+            elif path.startswith("/html/"):
+                kind, source_id = "html_list", int(path[6:])
+            elif path.startswith("/s/mock_channel_"):
+                kind, source_id = "telegram", int(path[len("/s/mock_channel_"):])
+            else:
+                return self.send_body(404, b"not found", "text/plain")
+
+            upstream.count("requests")
+            behaviour, delay = upstream.decide()
+            if source_id in upstream.dead:
+                behaviour = "error"
+            if behaviour == "hang":
+                upstream.count("hangs")
+            time.sleep(delay)
+
+            if behaviour == "error":
+                upstream.count("errors")
+                return self.send_body(500, b"injected failure", "text/plain")
+            if behaviour == "rate_limit":
+                upstream.count("rate_limited")
+                return self.send_body(429, b"too many requests", "text/plain", {"Retry-After": str(upstream.args.retry_after)})
+
+            version = upstream.content_version(source_id)
+            etag = '"' + hashlib.md5(f"{kind}-{source_id}-{version}-{before}".encode()).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                upstream.count("not_modified")
+                return self.send_body(304, b"", "text/plain", {"ETag": etag})
+
+            upstream.count("ok")
+            body = upstream.render(kind, source_id, version, base_url, before)
+            ctype = "application/rss+xml; charset=utf-8" if kind == "rss" else "text/html; charset=utf-8"
+            return self.send_body(200, body, ctype, {"ETag": etag})
+
+    return Handler
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Mock upstream server for load testing")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8900)
+    ap.add_argument("--sources", type=int, default=100, help="Number of synthetic sources (rss/html_list/telegram round-robin)")
+    ap.add_argument("--items", type=int, default=20, help="Items per payload")
+    ap.add_argument("--payload-kb", type=int, default=0, help="Extra padding per payload (KB)")
+    ap.add_argument("--delay", default="uniform:0.05,0.4", help="fixed:S | uniform:A,B | lognormal:MU,SIGMA | exp:MEAN")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    ap.add_argument("--ratelimit-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    ap.add_argument("--retry-after", type=int, default=30, help="Retry-After seconds sent with 429")
+    ap.add_argument("--hang-rate", type=float, default=0.0, help="Fraction of requests that stall for --hang-sec")
+    ap.add_argument("--hang-sec", type=float, default=30.0, help="Stall duration (beyond client timeouts)")
+    ap.add_argument("--dead-rate", type=float, default=0.0, help="Fraction of sources that always fail")
+    ap.add_argument("--change-every", type=int, default=300, help="Seconds between payload changes (0 = every request)")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--sources-out", default="mock_sources.json", help="Where to write the source list for SOURCES_FILE")
+    args = ap.parse_args()
+
+    upstream = MockUpstream(args)
+    base_url = f"http://{args.host}:{args.port}"
+    with open(args.sources_out, "w", encoding="utf-8") as f:
+        json.dump(upstream.source_list(base_url), f, ensure_ascii=False, indent=2)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(upstream))
+    server.daemon_threads = True
+    logger.info(f"Mock upstream on {base_url}: {args.sources} sources, {len(upstream.dead)} dead, delay={args.delay}")
+    logger.info(f"Source list written to {args.sources_out} (use SOURCES_FILE={args.sources_out})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger.info(f"Stats: {upstream.stats}")
+
+
+if __name__ == "__main__":
+    main()
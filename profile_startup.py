@@ -0,0 +1,103 @@
+"""
+Startup profiler.
+
+Reports per-module import times (python -X importtime) for an entry point and,
+with --serve, the wall time from spawning uvicorn until /health answers.
+
+Usage:
+    python profile_startup.py                          # import profile of app.main
+    python profile_startup.py --module app.telegram_bot
+    python profile_startup.py --serve --runs 5         # start-to-ready time of the API
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# "import time:  self [us] | cumulative | imported package"
+IMPORTTIME_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_profile(module: str):
+    """Import `module` in a fresh interpreter. Returns (wall_ms, [(name, self_ms, cumulative_ms, depth)])."""
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        tail = "\n".join(proc.stderr.splitlines()[-5:])
+        raise SystemExit(f"Importing {module} failed:\n{tail}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us) / 1000, int(cumulative_us) / 1000, (len(indent) - 1) // 2))
+    return wall_ms, rows
+
+
+def time_to_ready(port: int, timeout: float) -> float:
+    """Spawn uvicorn and poll /health. Returns ms until the first 200."""
+    url = f"http://127.0.0.1:{port}/health"
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - started) * 1000
+            except OSError:
+                time.sleep(0.01)
+        raise SystemExit(f"/health did not answer within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Import-time and start-to-ready profiler")
+    ap.add_argument("--module", default="app.main", help="Module to import")
+    ap.add_argument("--top", type=int, default=20, help="Rows per table")
+    ap.add_argument("--serve", action="store_true", help="Also measure uvicorn start until /health answers")
+    ap.add_argument("--port", type=int, default=8799)
+    ap.add_argument("--runs", type=int, default=3, help="Repetitions for --serve (median is reported)")
+    ap.add_argument("--timeout", type=float, default=60)
+    args = ap.parse_args()
+
+    wall_ms, rows = import_profile(args.module)
+    total = next((r[2] for r in rows if r[0] == args.module), 0)
+
+    print(f"{'Module (cumulative)':<50} | {'ms':>8}")
+    print("-" * 62)
+    for name, _, cumulative, depth in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"{'  ' * min(depth, 4) + name:<50} | {cumulative:>8.1f}")
+    print()
+    print(f"{'Module (self)':<50} | {'ms':>8}")
+    print("-" * 62)
+    for name, self_ms, _, _ in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+        print(f"{name:<50} | {self_ms:>8.1f}")
+    print()
+    print(f"import {args.module}: {total:.0f} ms ({len(rows)} modules, {wall_ms:.0f} ms process wall time)")
+
+    if args.serve:
+        runs = [time_to_ready(args.port, args.timeout) for _ in range(args.runs)]
+        print(f"uvicorn start -> /health 200: {statistics.median(runs):.0f} ms median of {len(runs)} "
+              f"(min {min(runs):.0f}, max {max(runs):.0f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
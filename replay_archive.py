@@ -0,0 +1,115 @@
+"""
+Offline replay of archived polls.
+
+Reruns the current parse, filter and scoring code over the raw bodies stored in
+the payload archive (ARCHIVE_DIR, see app/payload_archive.py), one archived poll
+at a time, without touching the network. Each poll sees, per source, the body of
+its latest fetch up to that poll, and is processed with the poll's own "now".
+
+Usage:
+    python replay_archive.py --stats                          # what the archive holds
+    python replay_archive.py --since 2026-03-01T08:00 --until 2026-03-01T12:00
+    python replay_archive.py --region abai --out replay.jsonl # accepted items per poll
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.payload_archive import ARCHIVE_DIR, PayloadArchive
+from app.rss_parser import RSSParser
+
+logging.basicConfig(level=logging.ERROR)
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay archived polls through the current pipeline")
+    ap.add_argument("--archive", default=ARCHIVE_DIR, help="Archive directory (default: ARCHIVE_DIR)")
+    ap.add_argument("--since", help="First poll to replay (ISO time, UTC if no offset)")
+    ap.add_argument("--until", help="Last poll to replay (ISO time, UTC if no offset)")
+    ap.add_argument("--region", help="Region profile to replay (default: the default region)")
+    ap.add_argument("--out", help="Write accepted items as JSON Lines, tagged with their poll")
+    ap.add_argument("--top", type=int, default=3, help="Top items printed per poll")
+    ap.add_argument("--stats", action="store_true", help="Only print archive statistics")
+    args = ap.parse_args()
+
+    if not args.archive or not os.path.isdir(args.archive):
+        print("No archive found. Set ARCHIVE_DIR (or pass --archive) to a directory written by the fetcher.")
+        return 1
+    archive = PayloadArchive(args.archive)
+    if args.stats:
+        print(json.dumps(archive.stats(), indent=2))
+        return 0
+
+    parser = RSSParser()
+    profile = parser.regions.get(args.region) if args.region else parser.profile
+    if profile is None:
+        print(f"Unknown region '{args.region}'. Known: {', '.join(parser.regions)}")
+        return 1
+
+    polls = archive.polls(parse_time(args.since), parse_time(args.until))
+    if not polls:
+        print("No archived polls in that range.")
+        return 1
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else None
+    # A body that did not change between polls is parsed once
+    parsed: Dict[tuple, list] = {}
+    missing = set()
+    started = time.perf_counter()
+    total_items = 0
+    try:
+        for poll in polls:
+            raw_entries = []
+            state = {url: records for url, records in archive.state_at(poll).items() if url in profile.source_urls}
+            for url, records in state.items():
+                for record in records:
+                    key = (record["sha256"], url)
+                    if key not in parsed:
+                        try:
+                            body = archive.load(record["sha256"])
+                        except (OSError, EOFError):
+                            # Pruned since the index was read, or cut short: replay without it
+                            missing.add(record["sha256"])
+                            body = None
+                        parsed[key] = parser.parse_source(record["source"], body) if body else []
+                    raw_entries.extend(parsed[key])
+
+            now = datetime.fromtimestamp(poll, timezone.utc)
+            accepted = parser.process_entries(raw_entries, now=now, profile=profile)
+            total_items += len(accepted)
+            print(f"{now.isoformat()} | {len(state):>3} sources | {len(raw_entries):>5} raw | {len(accepted):>4} accepted")
+            for item in accepted[:args.top]:
+                print(f"    [{item.score}] {item.title[:90]}")
+            if out:
+                for item in accepted:
+                    out.write(json.dumps(dict(item.to_dict(), poll=now.isoformat()), ensure_ascii=False) + "\n")
+    finally:
+        if out:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"\nReplayed {len(polls)} polls ({total_items} accepted items, {len(parsed)} distinct bodies parsed) in {elapsed:.2f}s")
+    if missing:
+        print(f"⚠️ {len(missing)} archived bodies were missing (pruned meanwhile?); their sources were replayed empty.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())